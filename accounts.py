@@ -0,0 +1,170 @@
+import asyncio
+from collections import OrderedDict
+
+from periodic import PeriodicTask
+
+# Flush pending balance changes after this many seconds...
+FLUSH_INTERVAL = 0.25
+# ...or as soon as this many changes are waiting, whichever comes first
+FLUSH_THRESHOLD = 200
+# Accounts kept in memory; only ones without pending changes are evicted
+MAX_CACHED_ACCOUNTS = 10000
+
+class AccountCache:
+    """User accounts cached in memory, with balance changes written back in batches"""
+
+    def __init__(self, db, ranks=None, flush_interval=FLUSH_INTERVAL, flush_threshold=FLUSH_THRESHOLD):
+        self.db = db
+        # Optional RankIndex kept in step with every balance change
+        self.ranks = ranks
+        self.flush_threshold = flush_threshold
+        self.accounts = OrderedDict()
+        self.pending = {}
+        self.pending_ops = 0
+        self.flushing = {}
+        # Bumped when a write straight to the database starts and when it ends
+        self.direct_writes = 0
+        # Direct writes currently running
+        self.writing = 0
+        self.wake = asyncio.Event()
+        self.flusher = PeriodicTask(self.flush, flush_interval, 'flushing balance changes', wake=self.wake)
+
+    def start(self):
+        """Start the background group-commit loop"""
+        self.flusher.start()
+
+    async def close(self):
+        """Stop the background loop and durably write everything still pending"""
+        await self.flusher.stop()
+        await self.flush()
+
+    async def get_user(self, user_id):
+        """Get or create user record, served from memory when cached"""
+        user_id = str(user_id)
+        account = self.accounts.get(user_id)
+        if account is None:
+            while True:
+                seen = self.direct_writes
+                account = await self.db.get_user(user_id)
+                # A direct write running during the fetch may or may not be in this row
+                if self.direct_writes == seen and not self.writing:
+                    break
+            # Another coroutine may have cached it while we were waiting
+            account = self.accounts.setdefault(user_id, account)
+            self._track(account)
+            self._evict()
+        self.accounts.move_to_end(user_id)
+        return account
+
+    async def update_balance(self, user_id, cash_change=0, bank_change=0):
+        """Update user's cash and bank balances and return the updated record.
+        The change reaches the database on the next flush"""
+        user_id = str(user_id)
+        account = await self.get_user(user_id)
+        account['cash_balance'] += cash_change
+        account['bank_balance'] += bank_change
+        self._track(account)
+
+        pending = self.pending.setdefault(user_id, [0, 0])
+        pending[0] += cash_change
+        pending[1] += bank_change
+        self.pending_ops += 1
+        if self.pending_ops >= self.flush_threshold:
+            self.wake.set()
+        return account
+
+    async def transfer(self, from_id, to_id, amount, robbery=False):
+        """Database.transfer, with the conditional check run against flushed balances"""
+        await self.flush()
+        # Rows fetched while the transfer runs already include it, so only adjust these
+        from_account = self.accounts.get(str(from_id))
+        to_account = self.accounts.get(str(to_id))
+        result = await self._write(self.db.transfer(from_id, to_id, amount, robbery=robbery))
+        if result is None:
+            return None
+        self._mirror(from_account, -amount)
+        self._mirror(to_account, amount)
+        from_account, to_account = from_account or result[0], to_account or result[1]
+        self._track(from_account)
+        self._track(to_account)
+        return from_account, to_account
+
+    async def update_robbery_stats(self, user_id, amount_stolen=0, success=True, cash_change=0):
+        # Creates the row for a new user, so the direct write below always finds it
+        account = await self.get_user(user_id)
+        user = await self._write(self.db.update_robbery_stats(user_id, amount_stolen=amount_stolen, success=success, cash_change=cash_change))
+        self._mirror(account, cash_change)
+        account = account or user
+        self._track(account)
+        return account
+
+    async def apply_direct(self, write, changes):
+        """Await write, a coroutine that commits balance changes to the database
+        itself, and mirror changes(result), its (user_id, cash_change) pairs,
+        into the cache if it returns a true value"""
+        # Only rows cached before the write started lack it
+        cached = dict(self.accounts)
+        result = await self._write(write)
+        if result:
+            for user_id, cash_change in changes(result):
+                user_id = str(user_id)
+                account = cached.get(user_id)
+                if account is not None:
+                    self._mirror(account, cash_change)
+                    self._track(account)
+                elif user_id in self.accounts:
+                    # Cached during the write, so the row already includes it
+                    self._track(self.accounts[user_id])
+                elif self.ranks is not None and user_id in self.ranks.wealth:
+                    # Not cached: move the rank by the change itself
+                    self.ranks.update(user_id, self.ranks.wealth[user_id] + cash_change)
+        return result
+
+    async def flush(self):
+        """Write all pending balance changes in one group commit"""
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, {}
+        self.pending_ops = 0
+        self.flushing = batch
+        try:
+            await self.db.apply_balance_changes(
+                [(user_id, cash, bank) for user_id, (cash, bank) in batch.items()]
+            )
+        except BaseException:
+            # Put the batch back so the next flush retries it
+            for user_id, (cash, bank) in batch.items():
+                pending = self.pending.setdefault(user_id, [0, 0])
+                pending[0] += cash
+                pending[1] += bank
+            raise
+        finally:
+            self.flushing = {}
+
+    async def _write(self, write):
+        # Flag a write going straight to the database so get_user refetches around it
+        self.direct_writes += 1
+        self.writing += 1
+        try:
+            return await write
+        finally:
+            self.writing -= 1
+            self.direct_writes += 1
+
+    def _mirror(self, account, cash_change):
+        # Reflect a change the database already committed
+        if account is not None:
+            account['cash_balance'] += cash_change
+
+    def _track(self, account):
+        if self.ranks is not None and account is not None:
+            self.ranks.update(account['user_id'], account['cash_balance'] + account['bank_balance'])
+
+    def _evict(self):
+        if len(self.accounts) <= MAX_CACHED_ACCOUNTS:
+            return
+        for user_id in list(self.accounts):
+            if len(self.accounts) <= MAX_CACHED_ACCOUNTS:
+                break
+            if user_id not in self.pending and user_id not in self.flushing:
+                del self.accounts[user_id]
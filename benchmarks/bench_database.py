@@ -0,0 +1,63 @@
+"""Per-operation latency of Database with a connection per call vs the shared connection.
+
+Run from the repository root:
+    python benchmarks/bench_database.py
+"""
+import asyncio
+from contextlib import asynccontextmanager
+import os
+import sys
+import tempfile
+import time
+
+import aiosqlite
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database import Database
+
+OPERATIONS = 2000
+USERS = 100
+
+class PerCallDatabase(Database):
+    """The old behaviour: a fresh sqlite connection for every method call"""
+
+    async def connect(self):
+        pass
+
+    async def close(self):
+        pass
+
+    @asynccontextmanager
+    async def get_connection(self):
+        async with aiosqlite.connect(self.db_file) as conn:
+            yield conn
+
+async def run_ops(db):
+    """Time a get_user/update_balance mix like the one !rob and !pay issue"""
+    await db.setup_database()
+    for user_id in range(USERS):
+        await db.get_user(user_id)
+
+    timings = {}
+    for name, op in (
+        ('get_user', lambda i: db.get_user(i % USERS)),
+        ('update_balance', lambda i: db.update_balance(i % USERS, cash_change=1)),
+    ):
+        start = time.perf_counter()
+        for i in range(OPERATIONS):
+            await op(i)
+        timings[name] = (time.perf_counter() - start) / OPERATIONS * 1e6
+    await db.close()
+    return timings
+
+async def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        before = await run_ops(PerCallDatabase(os.path.join(tmp, 'per_call.db')))
+        after = await run_ops(Database(os.path.join(tmp, 'shared.db')))
+
+    print(f"{'operation':<16}{'per call (us)':>16}{'shared (us)':>16}{'speedup':>10}")
+    for name in before:
+        print(f"{name:<16}{before[name]:>16.1f}{after[name]:>16.1f}{before[name] / after[name]:>9.1f}x")
+
+if __name__ == '__main__':
+    asyncio.run(main())
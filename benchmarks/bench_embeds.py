@@ -0,0 +1,37 @@
+"""Per-command cost of building help and error embeds inline vs serving them from the registry.
+
+Run from the repository root:
+    python benchmarks/bench_embeds.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from embeds import registry
+
+ITERATIONS = 20000
+
+def per_call_us(fn):
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn()
+    return (time.perf_counter() - start) / ITERATIONS * 1e6
+
+def main():
+    print(f"{'embed':<28}{'inline (us)':>14}{'registry (us)':>16}{'speedup':>10}")
+    for key, spec in registry.specs.items():
+        if '{' in (spec[1] or ''):
+            # Parametrized errors were built with an f-string each time
+            inline = per_call_us(lambda: registry._build(
+                spec[0], f"You need ${1000:,} in cash, but you only have ${500:,}!", *spec[2:]
+            ))
+            served = per_call_us(lambda: registry.fill(key, bet=1000, cash=500))
+        else:
+            # Building from the spec is what each command did before: Embed() plus add_field per field
+            inline = per_call_us(lambda: registry._build(*spec))
+            served = per_call_us(lambda: registry.get(key))
+        print(f"{key:<28}{inline:>14.2f}{served:>16.2f}{inline / served:>9.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -4,13 +4,29 @@ import os
 from datetime import datetime, timedelta
 import asyncio
 from games.blackjack import Blackjack, BlackjackView
-from games.roulette import Roulette
+from games.roulette import Roulette, MAX_BETS, parse_bet
+from games.lottery import pick_numbers, format_ticket_counts
+from games import rules
+from games.strategy import autoplay
 import random
 from dotenv import load_dotenv
 from keep_alive import keep_alive
 from database import Database
+from accounts import AccountCache
+from escrow import Escrow
+from ranking import RankIndex
+from names import NameCache
+from jackpot import JackpotAccumulator
+from scheduler import DeadlineScheduler
+from broadcast import Broadcaster
+from outbox import DMOutbox
+from sessions import SessionStore
+from ratelimit import RateLimiter
+from cooldowns import CooldownService
+from locks import UserLocks
+from periodic import PeriodicTask
+from embeds import registry as embeds
 import signal
-import sys
 
 # Load environment variables
 load_dotenv()
@@ -21,33 +37,119 @@ intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True
 
-bot = commands.Bot(command_prefix=COMMAND_PREFIX, intents=intents)
-
 # Initialize database
 db = Database()
+ranks = RankIndex()
+accounts = AccountCache(db, ranks=ranks)
+escrow = Escrow(accounts)
+jackpot = JackpotAccumulator(db)
+
+class CasinoBot(commands.Bot):
+    async def setup_hook(self):
+        # Create tables before any command can touch the database
+        await db.setup_database()
+        ranks.load(await db.get_leaderboard())
+        accounts.start()
+        jackpot.start()
+        await outbox.start()
+        await cooldowns.start()
+        # Buttons on game messages from before a restart keep working
+        global blackjack_view, rps_view
+        blackjack_view = BlackjackView(blackjack_table, sessions, accounts, escrow, jackpot=jackpot)
+        rps_view = RPSView()
+        await sessions.start()
+        # Stakes of games that were still running are held again
+        for session in sessions.sessions.values():
+            if session['game'] == 'blackjack':
+                blackjack_view.restore(session)
+            elif session['game'] == 'rps':
+                rps_view.restore(session)
+        self.add_view(blackjack_view)
+        sessions.on_expire('blackjack', blackjack_view.expire)
+        self.add_view(rps_view)
+        sessions.on_expire('rps', rps_view.expire)
+        # Started here rather than in on_ready, which fires again on every reconnect
+        lottery_scheduler.start()
+        stats_logger.start()
+        # Shut down through close() so pending balance changes get flushed;
+        # self.loop is unset once the client closes, so keep the running loop
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, lambda: loop.create_task(self.close()))
+
+    async def close(self):
+        if self.is_closed():
+            return
+        await lottery_scheduler.stop()
+        await stats_logger.stop()
+        await sessions.close()
+        # Everything is written before super().close() lets start() return,
+        # after which asyncio.run cancels whatever is still running
+        await accounts.close()
+        await jackpot.close()
+        await outbox.close()
+        await cooldowns.close()
+        await db.close()
+        await super().close()
+
+bot = CasinoBot(command_prefix=COMMAND_PREFIX, intents=intents)
+names = NameCache(bot)
+broadcaster = Broadcaster(bot)
+outbox = DMOutbox(bot, db)
+sessions = SessionStore(db)
+blackjack_table = Blackjack(bot)
+# Views need a running event loop, so these are built in setup_hook
+blackjack_view = None
+rps_view = None
+roulette_table = Roulette(bot)
+click_limiter = RateLimiter()
+cooldowns = CooldownService(db)
+user_locks = UserLocks()
 
 # Constants
 LOTTERY_TICKET_PRICE = 100  # Price per ticket
+LOTTERY_DRAW_INTERVAL = timedelta(days=1)
+BLACKJACK_AUTO_MAX_HANDS = 1000
+STATS_INTERVAL = 600  # Seconds between metrics lines in the log
+
+async def log_stats():
+    """Print lock contention and DM delivery counters"""
+    locks = user_locks.stats()
+    dms = outbox.stats()
+    print(
+        f"Locks: {locks['acquired']} acquired, {locks['contended']} contended, "
+        f"wait avg {locks['wait_avg'] * 1000:.1f} ms, max {locks['wait_max'] * 1000:.1f} ms, {locks['held']} held | "
+        f"DMs: {dms['sent']} sent, {dms['retried']} retried, {dms['failed']} failed, {dms['pending']} pending"
+    )
 
-def signal_handler(sig, frame):
-    print('\nShutting down bot gracefully...')
-    asyncio.run(bot.close())
-    sys.exit(0)
-
-signal.signal(signal.SIGINT, signal_handler)
-signal.signal(signal.SIGTERM, signal_handler)
+stats_logger = PeriodicTask(log_stats, STATS_INTERVAL, 'logging stats')
 
 @bot.event
 async def on_ready():
     print(f'{bot.user} has connected to Discord!')
-    bot.loop.create_task(lottery_draw_loop())
+
+@bot.listen()
+async def on_member_join(member):
+    names.remember(member)
+
+@bot.listen()
+async def on_member_update(before, after):
+    names.remember(after)
+
+@bot.listen()
+async def on_user_update(before, after):
+    names.remember(after)
+
+@bot.listen()
+async def on_guild_remove(guild):
+    broadcaster.forget(guild.id)
 
 @bot.command(name='balance')
 async def balance(ctx):
     user_id = str(ctx.author.id)
     
     # Get user data from database
-    user_data = db.get_user(user_id)
+    user_data = await accounts.get_user(user_id)
     cash_balance = user_data['cash_balance']
     bank_balance = user_data['bank_balance']
     total = cash_balance + bank_balance
@@ -63,341 +165,304 @@ async def balance(ctx):
     await ctx.send(embed=embed)
 
 @bot.command(name='blackjack', aliases=['bj'])
-async def blackjack(ctx, bet: str = None):
+async def blackjack(ctx, bet: str = None, *, args: str = None):
     user_id = str(ctx.author.id)
     
-    # Get user data from database
-    user_data = db.get_user(user_id)
-    
-    if bet is None:
-        embed = discord.Embed(
-            title="ℹ️ Blackjack Help",
-            description="To play blackjack, you need to specify a bet amount.",
-            color=discord.Color.blue()
-        )
-        embed.add_field(
-            name="Usage",
-            value="!blackjack <bet_amount>\nor\n!bj <bet_amount>\nor\n!blackjack all",
-            inline=False
-        )
-        embed.add_field(
-            name="Example",
-            value="!blackjack 100\n!blackjack all",
-            inline=False
-        )
-        await ctx.send(embed=embed)
-        return
+    # Hold the lock from the balance check until the balance is updated
+    async with user_locks.hold(user_id):
+        # Get user data from database
+        user_data = await accounts.get_user(user_id)
+        
+        if bet is None:
+            await ctx.send(embed=embeds.get('blackjack_help'))
+            return
+        
+        if bet.lower() == 'auto':
+            await blackjack_auto(ctx, user_data, args)
+            return
 
-    # Handle 'all' case
-    if bet.lower() == 'all':
-        bet = user_data['cash_balance']
-    else:
-        try:
-            bet = int(bet)
-        except ValueError:
-            embed = discord.Embed(
-                title="❌ Invalid Bet",
-                description="Bet amount must be a number or 'all'!",
-                color=discord.Color.red()
-            )
-            await ctx.send(embed=embed)
+        # Cash already held by running games can't be bet again
+        cash = escrow.available(user_data)
+        
+        # Handle 'all' case
+        if bet.lower() == 'all':
+            bet = cash
+        else:
+            try:
+                bet = int(bet)
+            except ValueError:
+                await ctx.send(embed=embeds.get('bet_not_a_number'))
+                return
+        
+        if bet > cash:
+            await ctx.send(embed=embeds.fill('insufficient_cash_for_bet', bet=bet, cash=cash))
             return
-    
-    if bet > user_data['cash_balance']:
-        embed = discord.Embed(
-            title="❌ Insufficient Cash",
-            description=f"You need ${bet:,} in cash, but you only have ${user_data['cash_balance']:,}!\nWithdraw from your bank first!",
-            color=discord.Color.red()
-        )
-        await ctx.send(embed=embed)
+        
+        if bet <= 0:
+            await ctx.send(embed=embeds.get('bet_not_positive'))
+            return
+        
+        # Deal from the shared shoe; the game continues in blackjack_view
+        await blackjack_view.start(ctx.channel, user_id, bet, user_data['cash_balance'])
+
+async def blackjack_auto(ctx, user_data, args):
+    """!blackjack auto <bet> <hands>: play hands rounds of basic strategy, settled at once"""
+    user_id = user_data['user_id']
+    bet, _, hands = (args or '').partition(' ')
+    if not bet or not hands:
+        await ctx.send(embed=embeds.get('blackjack_help'))
         return
     
+    try:
+        bet = int(bet)
+    except ValueError:
+        await ctx.send(embed=embeds.get('bet_not_a_number'))
+        return
     if bet <= 0:
+        await ctx.send(embed=embeds.get('bet_not_positive'))
+        return
+    
+    try:
+        hands = int(hands)
+        if not 1 <= hands <= BLACKJACK_AUTO_MAX_HANDS:
+            raise ValueError
+    except ValueError:
         embed = discord.Embed(
-            title="❌ Invalid Bet",
-            description="Bet amount must be greater than 0!",
+            title="❌ Invalid Hands",
+            description=f"Number of hands must be between 1 and {BLACKJACK_AUTO_MAX_HANDS:,}!",
             color=discord.Color.red()
         )
         await ctx.send(embed=embed)
         return
     
-    # Initialize game
-    game = Blackjack(bot)
-    player_hand = [game.deck.pop(), game.deck.pop()]
-    dealer_hand = [game.deck.pop(), game.deck.pop()]
+    # Every hand could lose, so the whole run has to be covered up front
+    total_bet = bet * hands
+    cash = escrow.available(user_data)
+    if total_bet > cash:
+        await ctx.send(embed=embeds.fill('insufficient_cash_for_bet', bet=total_bet, cash=cash))
+        return
     
-    # Create view with buttons
-    view = BlackjackView(game, player_hand, dealer_hand, bet, user_id, db)
+    wins, losses, pushes = autoplay(blackjack_table, hands)
+    net = (wins * rules.BLACKJACK_PAYOUT - losses) * bet
+    updated_data = await accounts.update_balance(user_id, cash_change=net)
+    jackpot.add_game_bet(losses * bet, 'blackjack')
     
-    # Show initial hands
-    embed = game.create_game_embed(
-        player_hand, 
-        dealer_hand, 
-        bet=bet,
-        balance=user_data['cash_balance']
+    embed = discord.Embed(
+        title="🤖 Blackjack Autoplay",
+        description=f"Played {hands:,} hands of basic strategy at ${bet:,} each.",
+        color=discord.Color.green() if net > 0 else discord.Color.red() if net < 0 else discord.Color.greyple()
     )
-    game_message = await ctx.send(embed=embed, view=view)
-    
-    # Wait for the view to timeout or the game to end
-    await view.wait()
-    
-    if not view.ended:
-        for child in view.children:
-            child.disabled = True
-        timeout_embed = discord.Embed(
-            title="⏰ Game Timed Out",
-            description="No action taken for 30 seconds",
-            color=discord.Color.light_grey()
-        )
-        await game_message.edit(embed=timeout_embed, view=view)
+    embed.add_field(name="🎉 Won", value=f"{wins:,}", inline=True)
+    embed.add_field(name="😔 Lost", value=f"{losses:,}", inline=True)
+    embed.add_field(name="🤝 Pushed", value=f"{pushes:,}", inline=True)
+    embed.add_field(name="📌 Net", value=f"{'+' if net >= 0 else '-'}${abs(net):,}", inline=True)
+    embed.add_field(name="💳 Your Balance", value=f"${updated_data['cash_balance']:,}", inline=True)
+    await ctx.send(embed=embed)
 
 @bot.command(name='roulette', aliases=['rl'])
-async def roulette(ctx, bet_value: str = None, amount: str = None):
+async def roulette(ctx, *args):
     user_id = str(ctx.author.id)
     
-    # Get user data from database
-    user_data = db.get_user(user_id)
-    
-    # Show help if parameters are missing
-    if None in (bet_value, amount):
-        embed = discord.Embed(
-            title="ℹ️ Roulette Help",
-            description="Place your bets on the roulette table!",
-            color=discord.Color.blue()
-        )
-        embed.add_field(
-            name="Usage",
-            value="!roulette <number/color> <bet>\n!roulette <number/color> all",
-            inline=False
-        )
-        embed.add_field(
-            name="Examples",
-            value="!roulette red 100\n!roulette 7 50\n!roulette black all",
-            inline=False
-        )
-        await ctx.send(embed=embed)
-        return
-
-    # Handle 'all' case
-    if amount.lower() == 'all':
-        bet = user_data['cash_balance']
-    else:
-        try:
-            bet = int(amount)
-        except ValueError:
+    # Hold the lock from the balance check until the balance is updated
+    async with user_locks.hold(user_id):
+        # Get user data from database
+        user_data = await accounts.get_user(user_id)
+        
+        # Show help if parameters are missing; bets come in <bet> <amount> pairs
+        if not args or len(args) % 2:
+            await ctx.send(embed=embeds.get('roulette_help'))
+            return
+        
+        if len(args) // 2 > MAX_BETS:
             embed = discord.Embed(
-                title="❌ Invalid Bet",
-                description="Bet amount must be a number or 'all'!",
+                title="❌ Too Many Bets",
+                description=f"You can place at most {MAX_BETS} bets per spin!",
                 color=discord.Color.red()
             )
             await ctx.send(embed=embed)
             return
+
+        # Cash already held by running games can't be bet again
+        cash = escrow.available(user_data)
+        bets = {}
+        for bet_value, amount in zip(args[::2], args[1::2]):
+            bet_index = parse_bet(bet_value)
+            if bet_index is None:
+                embed = discord.Embed(
+                    title="❌ Invalid Bet",
+                    description=(
+                        f"`{bet_value}` is not a bet! Bet on a number (0-36), a split (8/11), "
+                        "a dozen (1-12), a column (col1), red/black, even/odd or 1-18/19-36."
+                    ),
+                    color=discord.Color.red()
+                )
+                await ctx.send(embed=embed)
+                return
+            
+            # Handle 'all' case
+            if amount.lower() == 'all':
+                bet = cash
+            else:
+                try:
+                    bet = int(amount)
+                except ValueError:
+                    await ctx.send(embed=embeds.get('bet_not_a_number'))
+                    return
+            
+            if bet <= 0:
+                await ctx.send(embed=embeds.get('bet_not_positive'))
+                return
+            bets[bet_index] = bets.get(bet_index, 0) + bet
         
-    if bet > user_data['cash_balance']:
-        embed = discord.Embed(
-            title="❌ Insufficient Cash",
-            description=f"You need ${bet:,} in cash, but you only have ${user_data['cash_balance']:,}!\nWithdraw from your bank first!",
-            color=discord.Color.red()
-        )
-        await ctx.send(embed=embed)
-        return
+        total_bet = sum(bets.values())
+        if total_bet > cash:
+            await ctx.send(embed=embeds.fill('insufficient_cash_for_bet', bet=total_bet, cash=cash))
+            return
         
-    if bet <= 0:
-        embed = discord.Embed(
-            title="❌ Invalid Bet",
-            description="Bet amount must be greater than 0!",
-            color=discord.Color.red()
-        )
-        await ctx.send(embed=embed)
-        return
-
-    # Check if bet is on color or number
-    if bet_value.lower() in ['red', 'black']:
-        bet_type = 'color'
-    elif bet_value.isdigit() and 0 <= int(bet_value) <= 36:
-        bet_type = 'number'
-    else:
-        embed = discord.Embed(
-            title="❌ Invalid Bet",
-            description="Bet must be a color (red/black) or number (0-36)!",
-            color=discord.Color.red()
-        )
-        await ctx.send(embed=embed)
-        return
+        # One spin settles every bet with a single balance update
+        result = roulette_table.spin()
+        net, lost = roulette_table.settle(bets, result)
+        updated_data = await accounts.update_balance(user_id, cash_change=net)
+        jackpot.add_game_bet(lost, 'roulette')
         
-    game = Roulette(bot)
-    result = game.spin()
-    won, multiplier = game.check_bet(bet_type, bet_value, result)
-    
-    # Update cash balance through database
-    if won:
-        db.update_balance(user_id, cash_change=bet * multiplier)
-        embed = discord.Embed(
-            title="🎰 You Won!",
-            description=f"Ball landed on {result}!\nYou won ${bet * multiplier:,}!",
-            color=discord.Color.green()
-        )
-    else:
-        db.update_balance(user_id, cash_change=-bet)
-        embed = discord.Embed(
-            title="😢 You Lost!",
-            description=f"Ball landed on {result}!\nYou lost ${bet:,}!",
-            color=discord.Color.red()
-        )
-    
-    # Get updated user data
-    updated_data = db.get_user(user_id)
-    
-    embed.add_field(
-        name="💰 New Cash Balance",
-        value=f"${updated_data['cash_balance']:,}",
-        inline=False
-    )
-    
-    await ctx.send(embed=embed)
+        await ctx.send(embed=roulette_table.create_game_embed(result, bets, net, updated_data['cash_balance']))
 
 @bot.command(name='dice')
 async def dice(ctx, bet: str = None, number: str = None):
     user_id = str(ctx.author.id)
     
-    # Get user data from database
-    user_data = db.get_user(user_id)
-    
-    # Show help if parameters are missing
-    if None in (bet, number):
-        embed = discord.Embed(
-            title="🎲 Dice Help",
-            description="Bet on a dice roll (1-6)!",
-            color=discord.Color.blue()
-        )
-        embed.add_field(
-            name="Usage",
-            value="!dice <bet_amount> <number>",
-            inline=False
-        )
-        embed.add_field(
-            name="Example",
-            value="!dice 1000 6\n!dice all 3",
-            inline=False
-        )
-        embed.add_field(
-            name="Payout",
-            value="Win: 5x your bet\nLose: Lose your bet",
-            inline=False
-        )
-        await ctx.send(embed=embed)
-        return
+    # Hold the lock from the balance check until the balance is updated
+    async with user_locks.hold(user_id):
+        # Get user data from database
+        user_data = await accounts.get_user(user_id)
+        
+        # Show help if parameters are missing
+        if None in (bet, number):
+            await ctx.send(embed=embeds.get('dice_help'))
+            return
 
-    # Handle 'all' case
-    if bet.lower() == 'all':
-        bet = user_data['cash_balance']
-    else:
+        # Cash already held by running games can't be bet again
+        cash = escrow.available(user_data)
+
+        # Handle 'all' case
+        if bet.lower() == 'all':
+            bet = cash
+        else:
+            try:
+                bet = int(bet)
+            except ValueError:
+                await ctx.send(embed=embeds.get('bet_not_a_number'))
+                return
+
+        # Validate bet amount
+        if bet <= 0:
+            await ctx.send(embed=embeds.get('bet_not_positive'))
+            return
+
+        if bet > cash:
+            await ctx.send(embed=embeds.fill('insufficient_cash_for_bet', bet=bet, cash=cash))
+            return
+
+        # Validate number
         try:
-            bet = int(bet)
+            chosen_number = int(number)
+            if not 1 <= chosen_number <= rules.DICE_SIDES:
+                raise ValueError
         except ValueError:
             embed = discord.Embed(
-                title="❌ Invalid Bet",
-                description="Bet amount must be a number or 'all'!",
+                title="❌ Invalid Number",
+                description="Please choose a number between 1 and 6!",
                 color=discord.Color.red()
             )
             await ctx.send(embed=embed)
             return
 
-    # Validate bet amount
-    if bet <= 0:
-        embed = discord.Embed(
-            title="❌ Invalid Bet",
-            description="Bet amount must be greater than 0!",
-            color=discord.Color.red()
-        )
-        await ctx.send(embed=embed)
-        return
-
-    if bet > user_data['cash_balance']:
-        embed = discord.Embed(
-            title="❌ Insufficient Cash",
-            description=f"You need ${bet:,} in cash, but you only have ${user_data['cash_balance']:,}!",
-            color=discord.Color.red()
-        )
-        await ctx.send(embed=embed)
-        return
-
-    # Validate number
-    try:
-        chosen_number = int(number)
-        if not 1 <= chosen_number <= 6:
-            raise ValueError
-    except ValueError:
-        embed = discord.Embed(
-            title="❌ Invalid Number",
-            description="Please choose a number between 1 and 6!",
-            color=discord.Color.red()
-        )
-        await ctx.send(embed=embed)
-        return
-
-    # Roll the dice
-    roll = random.randint(1, 6)
-    
-    # Create suspense message
-    embed = discord.Embed(
-        title="🎲 Rolling the Dice...",
-        description="The dice is rolling...",
-        color=discord.Color.gold()
-    )
-    message = await ctx.send(embed=embed)
-    
-    # Add suspense delay
-    await asyncio.sleep(2)
-    
-    # Check result
-    if roll == chosen_number:
-        winnings = bet * 5
-        db.update_balance(user_id, cash_change=winnings - bet)  # Subtract original bet since we're adding total winnings
+        # Roll the dice
+        roll = random.randint(1, rules.DICE_SIDES)
         
-        embed = discord.Embed(
-            title="🎲 You Won!",
-            description=f"The dice rolled a {roll}!\nYou won ${winnings:,}!",
-            color=discord.Color.green()
-        )
-    else:
-        db.update_balance(user_id, cash_change=-bet)
+        # Hold the bet while the dice rolls, so games started from buttons can't take it
+        escrow.hold(user_id, bet)
+        try:
+            # Create suspense message
+            embed = discord.Embed(
+                title="🎲 Rolling the Dice...",
+                description="The dice is rolling...",
+                color=discord.Color.gold()
+            )
+            message = await ctx.send(embed=embed)
+            
+            # Add suspense delay
+            await asyncio.sleep(2)
+        except Exception:
+            escrow.release(user_id, bet)
+            raise
         
-        embed = discord.Embed(
-            title="🎲 You Lost!",
-            description=f"The dice rolled a {roll}!\nYou lost ${bet:,}!",
-            color=discord.Color.red()
+        # Check result
+        if roll == chosen_number:
+            winnings = bet * rules.DICE_PAYOUT
+            updated_data, = await escrow.settle([(user_id, bet, winnings - bet)])  # Subtract original bet since we're adding total winnings
+            
+            embed = discord.Embed(
+                title="🎲 You Won!",
+                description=f"The dice rolled a {roll}!\nYou won ${winnings:,}!",
+                color=discord.Color.green()
+            )
+        else:
+            updated_data, = await escrow.settle([(user_id, bet, -bet)])
+            jackpot.add_game_bet(bet, 'dice')
+            
+            embed = discord.Embed(
+                title="🎲 You Lost!",
+                description=f"The dice rolled a {roll}!\nYou lost ${bet:,}!",
+                color=discord.Color.red()
+            )
+        
+        embed.add_field(
+            name="💰 New Balance",
+            value=f"${updated_data['cash_balance']:,}",
+            inline=False
         )
-    
-    # Get updated user data
-    updated_data = db.get_user(user_id)
-    
-    embed.add_field(
-        name="💰 New Balance",
-        value=f"${updated_data['cash_balance']:,}",
-        inline=False
-    )
-    
-    await message.edit(embed=embed)
+        
+        await message.edit(embed=embed)
+
+async def allow_click(interaction):
+    """Token-bucket check for paginator clicks; answers throttled clicks itself"""
+    if click_limiter.allow((interaction.user.id, interaction.message.id)):
+        return True
+    await interaction.response.send_message("Slow down! You're clicking too fast.", ephemeral=True)
+    return False
 
 @bot.command(name='leaderboard', aliases=['lb'])
 async def leaderboard(ctx):
-    # Get leaderboard data from database
-    leaderboard_data = db.get_leaderboard()
+    # Count once per leaderboard; pages are fetched from the database as they are shown
+    await accounts.flush()
+    user_count = await db.count_users()
     
     # Calculate total pages (10 users per page)
     users_per_page = 10
-    total_pages = max(1, (len(leaderboard_data) + users_per_page - 1) // users_per_page)
+    total_pages = max(1, (user_count + users_per_page - 1) // users_per_page)
 
     class LeaderboardView(discord.ui.View):
         def __init__(self):
             super().__init__(timeout=60)
             self.current_page = 1
+            self.rows = []
+            self.loading = False
+
+        async def load_page(self, page):
+            # Seek from the edge of the page on screen instead of re-reading earlier rows
+            await accounts.flush()
+            if page == 1 or not self.rows:
+                self.rows = await db.get_leaderboard_page(users_per_page)
+            elif page > self.current_page:
+                self.rows = await db.get_leaderboard_page(users_per_page, after=self.rows[-1])
+            elif page < self.current_page:
+                self.rows = await db.get_leaderboard_page(users_per_page, before=self.rows[0])
+            self.current_page = page
 
         async def get_page_embed(self):
             start_idx = (self.current_page - 1) * users_per_page
-            end_idx = start_idx + users_per_page
-            current_page_users = leaderboard_data[start_idx:end_idx]
+            current_page_users = self.rows
 
             embed = discord.Embed(
                 title="💎 Richest Players",
@@ -405,34 +470,26 @@ async def leaderboard(ctx):
                 color=discord.Color.gold()
             )
 
+            # Resolve every name on the page in one go
+            usernames = await names.resolve([user_id for user_id, _ in current_page_users], guild=ctx.guild)
+
             for position, (user_id, wealth) in enumerate(current_page_users, start=start_idx + 1):
-                try:
-                    # Try to get member from guild first
-                    member = ctx.guild.get_member(int(user_id))
-                    if member is None:
-                        # If not found in guild, try to fetch user
-                        user = await bot.fetch_user(int(user_id))
-                        username = user.name if user else "Unknown User"
-                    else:
-                        username = member.name
-                    
-                    if position == 1:
-                        medal = "🥇"
-                    elif position == 2:
-                        medal = "🥈"
-                    elif position == 3:
-                        medal = "🥉"
-                    else:
-                        medal = "💰"
-                    
-                    embed.add_field(
-                        name=f"{medal} #{position} - {username}",
-                        value=f"${wealth:,}",
-                        inline=False
-                    )
-                except Exception as e:
-                    print(f"Error fetching user {user_id}: {e}")
-                    continue
+                username = usernames[str(user_id)]
+                
+                if position == 1:
+                    medal = "🥇"
+                elif position == 2:
+                    medal = "🥈"
+                elif position == 3:
+                    medal = "🥉"
+                else:
+                    medal = "💰"
+                
+                embed.add_field(
+                    name=f"{medal} #{position} - {username}",
+                    value=f"${wealth:,}",
+                    inline=False
+                )
 
             return embed
 
@@ -442,10 +499,18 @@ async def leaderboard(ctx):
                 await interaction.response.send_message("You can't use these buttons!", ephemeral=True)
                 return
 
-            # Add delay
-            await asyncio.sleep(0.5)
+            if not await allow_click(interaction):
+                return
+            # A page is still loading; this click would page from stale rows, so drop it
+            if self.loading:
+                await interaction.response.defer()
+                return
 
-            self.current_page = max(1, self.current_page - 1)
+            self.loading = True
+            try:
+                await self.load_page(max(1, self.current_page - 1))
+            finally:
+                self.loading = False
             
             # Update button states
             self.previous_button.disabled = self.current_page == 1
@@ -459,10 +524,18 @@ async def leaderboard(ctx):
                 await interaction.response.send_message("You can't use these buttons!", ephemeral=True)
                 return
 
-            # Add delay
-            await asyncio.sleep(0.5)
+            if not await allow_click(interaction):
+                return
+            # A page is still loading; this click would page from stale rows, so drop it
+            if self.loading:
+                await interaction.response.defer()
+                return
 
-            self.current_page = min(total_pages, self.current_page + 1)
+            self.loading = True
+            try:
+                await self.load_page(min(total_pages, self.current_page + 1))
+            finally:
+                self.loading = False
             
             # Update button states
             self.previous_button.disabled = self.current_page == 1
@@ -481,6 +554,7 @@ async def leaderboard(ctx):
 
     # Create and send the initial view
     view = LeaderboardView()
+    await view.load_page(1)
     view.next_button.disabled = total_pages == 1
     message = await ctx.send(embed=await view.get_page_embed(), view=view)
     view.message = message
@@ -490,11 +564,10 @@ async def money(ctx):
     user_id = str(ctx.author.id)
     
     # Get user data from database
-    user_data = db.get_user(user_id)
+    user_data = await accounts.get_user(user_id)
     
-    # Get leaderboard data to calculate rank
-    leaderboard_data = db.get_leaderboard()
-    rank = next(i for i, (uid, _) in enumerate(leaderboard_data, 1) if uid == user_id)
+    # Rank comes from the in-memory index, kept current by every balance change
+    rank = ranks.get_rank(user_id)
 
     embed = discord.Embed(
         title=f"💰 {ctx.author.name}'s Money",
@@ -510,36 +583,24 @@ async def money(ctx):
 @bot.command(name='work')
 async def work(ctx):
     user_id = str(ctx.author.id)
-    current_time = datetime.now()
     
-    # Get user data from database
-    user_data = db.get_user(user_id)
-    
-    # Check cooldown
-    last_work = user_data.get('last_work')
-    if last_work:
-        last_work = datetime.fromisoformat(last_work)
-        time_diff = current_time - last_work
-        if time_diff < timedelta(hours=1):
-            remaining = timedelta(hours=1) - time_diff
-            minutes = int(remaining.total_seconds() / 60)
-            embed = discord.Embed(
-                title="⏳ Work Cooldown",
-                description=f"You need to wait {minutes} minutes before working again!",
-                color=discord.Color.red()
-            )
-            await ctx.send(embed=embed)
-            return
+    # Check and start the cooldown in memory
+    remaining = cooldowns.try_use(user_id, 'work')
+    if remaining:
+        minutes = remaining // 60
+        embed = discord.Embed(
+            title="⏳ Work Cooldown",
+            description=f"You need to wait {minutes} minutes before working again!",
+            color=discord.Color.red()
+        )
+        await ctx.send(embed=embed)
+        return
     
     # Generate random earnings
-    earnings = random.randint(1000, 5000)
+    earnings = random.randint(rules.WORK_PAY_MIN, rules.WORK_PAY_MAX)
     
-    # Update user's balance and set cooldown
-    db.update_balance(user_id, cash_change=earnings)
-    db.set_cooldown(user_id, 'work')
-    
-    # Get updated user data
-    updated_data = db.get_user(user_id)
+    # Update user's balance
+    updated_data = await accounts.update_balance(user_id, cash_change=earnings)
     
     # Create list of work messages
     work_messages = [
@@ -579,32 +640,23 @@ async def work(ctx):
 @bot.command(name='crime')
 async def crime(ctx):
     user_id = str(ctx.author.id)
-    current_time = datetime.now()
     
-    # Get user data from database
-    user_data = db.get_user(user_id)
-    
-    # Check cooldown
-    last_crime = user_data.get('last_work')
-    if last_crime:
-        last_crime = datetime.fromisoformat(last_crime)
-        time_diff = current_time - last_crime
-        if time_diff < timedelta(hours=1):
-            remaining = timedelta(hours=1) - time_diff
-            minutes = int(remaining.total_seconds() / 60)
-            embed = discord.Embed(
-                title="⏳ Cooldown",
-                description=f"You need to wait {minutes} minutes before working again!",
-                color=discord.Color.red()
-            )
-            await ctx.send(embed=embed)
-            return
+    # Check and start the cooldown in memory
+    remaining = cooldowns.try_use(user_id, 'crime')
+    if remaining:
+        minutes = remaining // 60
+        embed = discord.Embed(
+            title="⏳ Cooldown",
+            description=f"You need to wait {minutes} minutes before committing another crime!",
+            color=discord.Color.red()
+        )
+        await ctx.send(embed=embed)
+        return
     
     # 20% success rate
-    if random.random() <= 0.20:  # Success
-        earnings = random.randint(30000, 50000)
-        db.update_balance(user_id, cash_change=earnings)
-        db.update_robbery_stats(user_id, amount_stolen=earnings, success=True)
+    if random.random() < rules.CRIME_SUCCESS_CHANCE:  # Success
+        earnings = random.randint(rules.CRIME_REWARD_MIN, rules.CRIME_REWARD_MAX)
+        updated_data = await accounts.update_robbery_stats(user_id, amount_stolen=earnings, success=True, cash_change=earnings)
         
         # Create list of success messages
         success_messages = [
@@ -625,9 +677,8 @@ async def crime(ctx):
         )
         
     else:  # Failure
-        fine = 10000
-        db.update_balance(user_id, cash_change=-fine)
-        db.update_robbery_stats(user_id, amount_stolen=0, success=False)
+        fine = rules.CRIME_FINE
+        updated_data = await accounts.update_robbery_stats(user_id, amount_stolen=0, success=False, cash_change=-fine)
         
         # Create list of failure messages
         failure_messages = [
@@ -647,12 +698,6 @@ async def crime(ctx):
             color=discord.Color.red()
         )
     
-    # Set cooldown
-    db.set_cooldown(user_id, 'work')
-    
-    # Get updated user data
-    updated_data = db.get_user(user_id)
-    
     embed.add_field(
         name="💰 New Balance",
         value=f"${updated_data['cash_balance']:,}",
@@ -670,33 +715,26 @@ async def crime(ctx):
 @bot.command(name='97ab')
 async def adult_work(ctx):
     user_id = str(ctx.author.id)
-    current_time = datetime.now()
     
-    # Get user data from database
-    user_data = db.get_user(user_id)
-    
-    # Check cooldown
-    last_crime = user_data.get('last_work')
-    if last_crime:
-        last_crime = datetime.fromisoformat(last_crime)
-        time_diff = current_time - last_crime
-        if time_diff < timedelta(hours=1):
-            remaining = timedelta(hours=1) - time_diff
-            minutes = int(remaining.total_seconds() / 60)
-            embed = discord.Embed(
-                title="⏳ Cooldown",
-                description=f"You need to wait {minutes} minutes before working again!",
-                color=discord.Color.red()
-            )
-            await ctx.send(embed=embed)
-            return
+    # Shares the work cooldown
+    remaining = cooldowns.try_use(user_id, 'work')
+    if remaining:
+        minutes = remaining // 60
+        embed = discord.Embed(
+            title="⏳ Cooldown",
+            description=f"You need to wait {minutes} minutes before working again!",
+            color=discord.Color.red()
+        )
+        await ctx.send(embed=embed)
+        return
     
     # Random number for outcome
     chance = random.random()
+    updated_data = await accounts.get_user(user_id)
     
     if chance <= 0.20:  # 20% chance for original easter egg
         earnings = random.randint(10, 100)
-        db.update_balance(user_id, cash_change=earnings)
+        updated_data = await accounts.update_balance(user_id, cash_change=earnings)
         
         embed = discord.Embed(
             title="97ba rkhisa ajomi",
@@ -713,7 +751,7 @@ async def adult_work(ctx):
         
     else:  # 40% chance for second new outcome
         earnings = 50
-        db.update_balance(user_id, cash_change=earnings)
+        updated_data = await accounts.update_balance(user_id, cash_change=earnings)
         
         embed = discord.Embed(
             title="rgadti b alf",
@@ -721,12 +759,6 @@ async def adult_work(ctx):
             color=discord.Color.green()
         )
     
-    # Set cooldown
-    db.set_cooldown(user_id, 'work')
-    
-    # Get updated user data
-    updated_data = db.get_user(user_id)
-    
     embed.add_field(
         name="💰 New Balance",
         value=f"${updated_data['cash_balance']:,}",
@@ -744,261 +776,147 @@ async def adult_work(ctx):
 @bot.command(name='nextwork')
 async def nextwork(ctx):
     user_id = str(ctx.author.id)
-    current_time = datetime.now()
-    
-    # Get user data from database
-    user_data = db.get_user(user_id)
-    last_work = user_data.get('last_work')
+    remaining = cooldowns.remaining(user_id, 'work')
     
-    if not last_work:
+    if not remaining:
         embed = discord.Embed(
             title="✅ Work Available!",
             description="You can work right now! Use !work to earn money.",
             color=discord.Color.green()
         )
     else:
-        last_work = datetime.fromisoformat(last_work)
-        time_diff = current_time - last_work
-        
-        if time_diff >= timedelta(hours=1):
-            embed = discord.Embed(
-                title="✅ Work Available!",
-                description="You can work right now! Use !work to earn money.",
-                color=discord.Color.green()
-            )
-        else:
-            remaining = timedelta(hours=1) - time_diff
-            minutes = int(remaining.total_seconds() / 60)
-            embed = discord.Embed(
-                title="⏳ Work Cooldown",
-                description=f"You need to wait {minutes} minutes before working again!",
-                color=discord.Color.gold()
-            )
+        minutes = remaining // 60
+        embed = discord.Embed(
+            title="⏳ Work Cooldown",
+            description=f"You need to wait {minutes} minutes before working again!",
+            color=discord.Color.gold()
+        )
     
     await ctx.send(embed=embed)
 
 @bot.command(name='botm9wd', aliases=['commands', 'menu'])
 async def botm9wd_help(ctx):
-    embed = discord.Embed(
-        title="🎰 Casino Bot Commands",
-        description="Here are all available commands:",
-        color=discord.Color.blue()
-    )
-    
-    # Banking Commands
-    embed.add_field(
-        name="🏦 Banking",
-        value=(
-            "**!deposit/!dep <amount>** - Deposit cash to your bank (safe from robbery)\n"
-            "**!withdraw/!with <amount>** - Withdraw cash from your bank\n"
-            "**!pay <@user> <amount>** - Pay another player from your cash\n"
-            "**!money/!bal** - Check your balances and rank\n"
-            "**!rob <@user>** - Rob someone's cash"
-        ),
-        inline=False
-    )
-    
-    # Games Commands
-    embed.add_field(
-        name="🎮 Games",
-        value=(
-            "**!blackjack/!bj <bet>** - Play blackjack\n"
-            "**!roulette/!rl <number/color> <bet>** - Play roulette\n"
-            "**!dice <bet> <number>** - Bet on a dice roll (1-6)\n"
-            "**!rps @player <bet>** - Challenge someone to Rock Paper Scissors\n"
-            "**!lottery/!lot** - View lottery status\n"
-            "**!lottery buy <amount>** - Buy lottery tickets\n"
-            "**!lottery numbers** - View your tickets\n"
-            "• Use 'all' to bet all your cash\n"
-            "• Roulette: bet on numbers (0-36) or colors (red/black)\n"
-            "• Dice: Win 5x your bet if you guess right\n"
-            "• Lottery draws happen daily with growing jackpot"
-        ),
-        inline=False
-    )
-    
-    # Economy Commands
-    embed.add_field(
-        name="💰 Economy",
-        value=(
-            "**!work** - Work to earn money (1-hour cooldown)\n"
-            "**!nextwork** - Check when you can work again\n"
-            "**!crime** - Commit a crime (high risk/reward, 1h cooldown)\n"
-            "**!97ab** - Special work (1h cooldown)\n"
-            "**!leaderboard/!lb** - View richest players"
-        ),
-        inline=False
-    )
-    
-    # Additional Information
-    embed.add_field(
-        name="💡 Tips",
-        value=(
-            "• Starting balance: $10,000\n"
-            "• Work earns $1,000-$5,000\n"
-            "• Crime earns $30,000-$50,000\n"
-            "• Failed robbery: 30% fine of total balance\n"
-            "• Successful robbery: 60-100% of target's cash"
-        ),
-        inline=False
-    )
-    
-    embed.set_footer(text="Use !botm9wd, !commands, or !menu to see this menu again")
-    
-    await ctx.send(embed=embed)
+    await ctx.send(embed=embeds.get('menu'))
 
 @bot.command(name='deposit', aliases=['dep'])
 async def deposit(ctx, amount: str = None):
     user_id = str(ctx.author.id)
     
-    # Get user data from database
-    user_data = db.get_user(user_id)
+    # Hold the lock from the balance check until the balance is updated
+    async with user_locks.hold(user_id):
+        # Get user data from database
+        user_data = await accounts.get_user(user_id)
 
-    if amount is None:
-        embed = discord.Embed(
-            title="ℹ️ Deposit Help",
-            description="Deposit your cash into the bank for safekeeping.",
-            color=discord.Color.blue()
-        )
-        embed.add_field(name="Usage", value="!deposit <amount>\n!deposit all", inline=False)
-        embed.add_field(name="Examples", value="!deposit 1000\n!deposit all", inline=False)
-        await ctx.send(embed=embed)
-        return
+        if amount is None:
+            await ctx.send(embed=embeds.get('deposit_help'))
+            return
 
-    # Check if user has any cash first
-    if user_data['cash_balance'] <= 0:
-        embed = discord.Embed(
-            title="❌ No Cash to Deposit",
-            description=f"You have no cash to deposit!\nYour bank balance: ${user_data['bank_balance']:,}\n\nUse `!withdraw <amount>` or `!with <amount>` to withdraw money from your bank.",
-            color=discord.Color.red()
-        )
-        await ctx.send(embed=embed)
-        return
+        # Cash held by running games stays out of the bank until they end
+        cash = escrow.available(user_data)
 
-    # Handle 'all' case
-    if amount.lower() == 'all':
-        amount = user_data['cash_balance']
-    else:
-        try:
-            amount = int(amount)
-        except ValueError:
+        # Check if user has any cash first
+        if cash <= 0:
             embed = discord.Embed(
-                title="❌ Invalid Amount",
-                description="Amount must be a number or 'all'!",
+                title="❌ No Cash to Deposit",
+                description=f"You have no cash to deposit!\nYour bank balance: ${user_data['bank_balance']:,}\n\nUse `!withdraw <amount>` or `!with <amount>` to withdraw money from your bank.",
                 color=discord.Color.red()
             )
             await ctx.send(embed=embed)
             return
 
-    if amount <= 0:
-        embed = discord.Embed(
-            title="❌ Invalid Amount",
-            description="Amount must be greater than 0!",
-            color=discord.Color.red()
-        )
-        await ctx.send(embed=embed)
-        return
+        # Handle 'all' case
+        if amount.lower() == 'all':
+            amount = cash
+        else:
+            try:
+                amount = int(amount)
+            except ValueError:
+                await ctx.send(embed=embeds.get('amount_not_a_number'))
+                return
+
+        if amount <= 0:
+            await ctx.send(embed=embeds.get('amount_not_positive'))
+            return
+
+        if amount > cash:
+            embed = discord.Embed(
+                title="❌ Insufficient Cash",
+                description=f"You only have ${cash:,} in cash!\nYour bank balance: ${user_data['bank_balance']:,}",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+
+        # Process deposit through database
+        updated_data = await accounts.update_balance(user_id, cash_change=-amount, bank_change=amount)
 
-    if amount > user_data['cash_balance']:
         embed = discord.Embed(
-            title="❌ Insufficient Cash",
-            description=f"You only have ${user_data['cash_balance']:,} in cash!\nYour bank balance: ${user_data['bank_balance']:,}",
-            color=discord.Color.red()
+            title="💰 Deposit Successful",
+            description=f"Deposited ${amount:,} into your bank account!",
+            color=discord.Color.green()
         )
+        embed.add_field(name="💵 Cash Balance", value=f"${updated_data['cash_balance']:,}", inline=True)
+        embed.add_field(name="🏦 Bank Balance", value=f"${updated_data['bank_balance']:,}", inline=True)
         await ctx.send(embed=embed)
-        return
-
-    # Process deposit through database
-    db.update_balance(user_id, cash_change=-amount, bank_change=amount)
-    
-    # Get updated data
-    updated_data = db.get_user(user_id)
-
-    embed = discord.Embed(
-        title="💰 Deposit Successful",
-        description=f"Deposited ${amount:,} into your bank account!",
-        color=discord.Color.green()
-    )
-    embed.add_field(name="💵 Cash Balance", value=f"${updated_data['cash_balance']:,}", inline=True)
-    embed.add_field(name="🏦 Bank Balance", value=f"${updated_data['bank_balance']:,}", inline=True)
-    await ctx.send(embed=embed)
 
 @bot.command(name='withdraw', aliases=['with'])
 async def withdraw(ctx, amount: str = None):
     user_id = str(ctx.author.id)
     
-    # Get user data from database
-    user_data = db.get_user(user_id)
+    # Hold the lock from the balance check until the balance is updated
+    async with user_locks.hold(user_id):
+        # Get user data from database
+        user_data = await accounts.get_user(user_id)
 
-    if amount is None:
-        embed = discord.Embed(
-            title="ℹ️ Withdraw Help",
-            description="Withdraw money from your bank account.",
-            color=discord.Color.blue()
-        )
-        embed.add_field(name="Usage", value="!withdraw <amount>\n!withdraw all", inline=False)
-        embed.add_field(name="Examples", value="!withdraw 1000\n!withdraw all", inline=False)
-        await ctx.send(embed=embed)
-        return
+        if amount is None:
+            await ctx.send(embed=embeds.get('withdraw_help'))
+            return
 
-    # Handle 'all' case
-    if amount.lower() == 'all':
-        amount = user_data['bank_balance']
-    else:
-        try:
-            amount = int(amount)
-        except ValueError:
+        # Handle 'all' case
+        if amount.lower() == 'all':
+            amount = user_data['bank_balance']
+        else:
+            try:
+                amount = int(amount)
+            except ValueError:
+                await ctx.send(embed=embeds.get('amount_not_a_number'))
+                return
+
+        if amount <= 0:
+            await ctx.send(embed=embeds.get('amount_not_positive'))
+            return
+
+        if amount > user_data['bank_balance']:
             embed = discord.Embed(
-                title="❌ Invalid Amount",
-                description="Amount must be a number or 'all'!",
+                title="❌ Insufficient Funds",
+                description=f"You only have ${user_data['bank_balance']:,} in your bank account!",
                 color=discord.Color.red()
             )
             await ctx.send(embed=embed)
             return
 
-    if amount <= 0:
-        embed = discord.Embed(
-            title="❌ Invalid Amount",
-            description="Amount must be greater than 0!",
-            color=discord.Color.red()
-        )
-        await ctx.send(embed=embed)
-        return
+        # Process withdrawal through database
+        updated_data = await accounts.update_balance(user_id, cash_change=amount, bank_change=-amount)
 
-    if amount > user_data['bank_balance']:
         embed = discord.Embed(
-            title="❌ Insufficient Funds",
-            description=f"You only have ${user_data['bank_balance']:,} in your bank account!",
-            color=discord.Color.red()
+            title="💸 Withdrawal Successful",
+            description=f"Withdrew ${amount:,} from your bank account!",
+            color=discord.Color.green()
         )
+        embed.add_field(name="💵 Cash Balance", value=f"${updated_data['cash_balance']:,}", inline=True)
+        embed.add_field(name="🏦 Bank Balance", value=f"${updated_data['bank_balance']:,}", inline=True)
+        
         await ctx.send(embed=embed)
-        return
-
-    # Process withdrawal through database
-    db.update_balance(user_id, cash_change=amount, bank_change=-amount)
-    
-    # Get updated data
-    updated_data = db.get_user(user_id)
-
-    embed = discord.Embed(
-        title="💸 Withdrawal Successful",
-        description=f"Withdrew ${amount:,} from your bank account!",
-        color=discord.Color.green()
-    )
-    embed.add_field(name="💵 Cash Balance", value=f"${updated_data['cash_balance']:,}", inline=True)
-    embed.add_field(name="🏦 Bank Balance", value=f"${updated_data['bank_balance']:,}", inline=True)
-    
-    await ctx.send(embed=embed)
 
 @bot.command(name='chfara')
 async def chfara(ctx, page: int = 1):
     user_id = str(ctx.author.id)
     
     # Get user's robbery stats
-    user_stats = db.get_robbery_stats(user_id)
+    user_stats = await db.get_robbery_stats(user_id)
     
     # Get all robbery stats for leaderboard in one query
-    all_stats = db.get_all_robbery_stats()
+    all_stats = await db.get_all_robbery_stats()
     
     # Filter out users with no stolen amount and sort
     sorted_robbers = [(uid, stats) for uid, stats in all_stats if stats['total_stolen'] > 0]
@@ -1050,34 +968,26 @@ async def chfara(ctx, page: int = 1):
                 inline=False
             )
             
+            # Resolve every name on the page in one go
+            usernames = await names.resolve([user_id for user_id, _ in current_page_users], guild=ctx.guild)
+
             for position, (user_id, stats) in enumerate(current_page_users, start=start_idx + 1):
-                try:
-                    # Try to get member from guild first
-                    member = ctx.guild.get_member(int(user_id))
-                    if member is None:
-                        # If not found in guild, try to fetch user
-                        user = await bot.fetch_user(int(user_id))
-                        username = user.name if user else "Unknown User"
-                    else:
-                        username = member.name
-                    
-                    if position == 1:
-                        medal = "🥇"
-                    elif position == 2:
-                        medal = "🥈"
-                    elif position == 3:
-                        medal = "🥉"
-                    else:
-                        medal = "💰"
-                    
-                    embed.add_field(
-                        name=f"{medal} #{position} - {username}",
-                        value=f"Total Stolen: ${stats['total_stolen']:,}",
-                        inline=False
-                    )
-                except Exception as e:
-                    print(f"Error fetching user {user_id}: {e}")
-                    continue
+                username = usernames[str(user_id)]
+                
+                if position == 1:
+                    medal = "🥇"
+                elif position == 2:
+                    medal = "🥈"
+                elif position == 3:
+                    medal = "🥉"
+                else:
+                    medal = "💰"
+                
+                embed.add_field(
+                    name=f"{medal} #{position} - {username}",
+                    value=f"Total Stolen: ${stats['total_stolen']:,}",
+                    inline=False
+                )
             
             return embed
 
@@ -1087,8 +997,8 @@ async def chfara(ctx, page: int = 1):
                 await interaction.response.send_message("You can't use these buttons!", ephemeral=True)
                 return
 
-            # Add delay
-            await asyncio.sleep(0.5)
+            if not await allow_click(interaction):
+                return
 
             self.current_page = max(1, self.current_page - 1)
             
@@ -1104,8 +1014,8 @@ async def chfara(ctx, page: int = 1):
                 await interaction.response.send_message("You can't use these buttons!", ephemeral=True)
                 return
 
-            # Add delay
-            await asyncio.sleep(0.5)
+            if not await allow_click(interaction):
+                return
 
             self.current_page = min(total_pages, self.current_page + 1)
             
@@ -1124,216 +1034,198 @@ async def chfara(ctx, page: int = 1):
             except:
                 pass
 
-    # Create and send the initial view
-    view = RobberyStatsView(user_id)
-    view.next_button.disabled = total_pages == 1
-    message = await ctx.send(embed=await view.get_page_embed(), view=view)
-    view.message = message
-
-@bot.command(name='rob')
-async def rob(ctx, target: discord.Member = None):
-    if target is None:
-        embed = discord.Embed(
-            title="ℹ️ Rob Help",
-            description="Rob another player's cash!",
-            color=discord.Color.blue()
-        )
-        embed.add_field(
-            name="Usage",
-            value="!rob @username",
-            inline=False
-        )
-        embed.add_field(
-            name="Example",
-            value="!rob @JohnDoe",
-            inline=False
-        )
-        embed.add_field(
-            name="Stats",
-            value="Use !chfara to view robbery statistics!",
-            inline=False
-        )
-        await ctx.send(embed=embed)
+    # Create and send the initial view
+    view = RobberyStatsView(user_id)
+    view.next_button.disabled = total_pages == 1
+    message = await ctx.send(embed=await view.get_page_embed(), view=view)
+    view.message = message
+
+@bot.command(name='rob')
+async def rob(ctx, target: discord.Member = None):
+    if target is None:
+        await ctx.send(embed=embeds.get('rob_help'))
         return
 
     robber_id = str(ctx.author.id)
     target_id = str(target.id)
     
-    # Get data for both users
-    robber_data = db.get_user(robber_id)
-    target_data = db.get_user(target_id)
-    
-    # Can't rob yourself
-    if robber_id == target_id:
-        embed = discord.Embed(
-            title="🤦‍♂️ Bruh",
-            description="You can't rob yourself!",
-            color=discord.Color.red()
-        )
-        await ctx.send(embed=embed)
-        return
+    # Both balances must stay put until the robbery is settled
+    async with user_locks.hold(robber_id, target_id):
+        # Get data for both users
+        robber_data = await accounts.get_user(robber_id)
+        target_data = await accounts.get_user(target_id)
+        
+        # Can't rob yourself
+        if robber_id == target_id:
+            embed = discord.Embed(
+                title="🤦‍♂️ Bruh",
+                description="You can't rob yourself!",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
 
-    # Check if target has cash to steal
-    if target_data['cash_balance'] <= 0:
-        db.update_robbery_stats(robber_id, amount_stolen=0, success=False)
-        embed = discord.Embed(
-            title="😅 Failed Robbery",
-            description=f"{target.mention} has no cash to steal!",
-            color=discord.Color.red()
-        )
-        await ctx.send(embed=embed)
-        return
+        # Stakes in the target's running games can't be stolen
+        target_cash = escrow.available(target_data)
+
+        # Check if target has cash to steal
+        if target_cash <= 0:
+            await accounts.update_robbery_stats(robber_id, amount_stolen=0, success=False)
+            embed = discord.Embed(
+                title="😅 Failed Robbery",
+                description=f"{target.mention} has no cash to steal!",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
 
-    # 20% chance of getting caught
-    if random.random() < 0.2:
-        # Calculate fine (30% of total balance)
-        total_balance = robber_data['cash_balance'] + robber_data['bank_balance']
-        fine = int(total_balance * 0.3)
+        # 20% chance of getting caught
+        if random.random() < rules.ROB_CAUGHT_CHANCE:
+            # Calculate fine (30% of total balance)
+            total_balance = robber_data['cash_balance'] + robber_data['bank_balance']
+            fine = int(total_balance * rules.ROB_FINE_RATE)
+            
+            # Update database
+            updated_robber = await accounts.update_robbery_stats(robber_id, amount_stolen=0, success=False, cash_change=-fine)
+
+            embed = discord.Embed(
+                title="🚔 Caught in the Act!",
+                description=f"You were caught trying to rob {target.mention}!",
+                color=discord.Color.red()
+            )
+            embed.add_field(
+                name="💰 Fine",
+                value=f"You were fined ${fine:,}!",
+                inline=False
+            )
+            embed.add_field(
+                name="💵 New Cash Balance",
+                value=f"${updated_robber['cash_balance']:,}",
+                inline=False
+            )
+            await ctx.send(embed=embed)
+            return
+
+        # Successful robbery (80% chance)
+        percentage = random.uniform(rules.ROB_STEAL_MIN, rules.ROB_STEAL_MAX)
+        stolen_amount = int(target_cash * percentage)
         
-        # Update database
-        db.update_balance(robber_id, cash_change=-fine)
-        db.update_robbery_stats(robber_id, amount_stolen=0, success=False)
+        # Move the cash and record the robbery in one transaction, holding it until it has moved
+        escrow.hold(target_id, stolen_amount)
+        try:
+            result = await accounts.transfer(target_id, robber_id, stolen_amount, robbery=True)
+        finally:
+            escrow.release(target_id, stolen_amount)
+        if result is None:
+            # Target spent their cash while we were counting it
+            await accounts.update_robbery_stats(robber_id, amount_stolen=0, success=False)
+            embed = discord.Embed(
+                title="😅 Failed Robbery",
+                description=f"{target.mention} has no cash to steal!",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
         
-        # Get updated robber data
-        updated_robber = db.get_user(robber_id)
+        # Get updated robber data and stats
+        updated_robber = result[1]
+        robbery_stats = await db.get_robbery_stats(robber_id)
 
         embed = discord.Embed(
-            title="🚔 Caught in the Act!",
-            description=f"You were caught trying to rob {target.mention}!",
-            color=discord.Color.red()
+            title="🦹‍♂️ Successful Robbery!",
+            description=f"You stole ${stolen_amount:,} from {target.mention}!",
+            color=discord.Color.green()
         )
         embed.add_field(
-            name="💰 Fine",
-            value=f"You were fined ${fine:,}!",
+            name="💰 Your New Cash Balance",
+            value=f"${updated_robber['cash_balance']:,}",
             inline=False
         )
         embed.add_field(
-            name="💵 New Cash Balance",
-            value=f"${updated_robber['cash_balance']:,}",
+            name="📊 Total Amount Stolen",
+            value=f"${robbery_stats['total_stolen']:,}",
             inline=False
         )
+        
         await ctx.send(embed=embed)
-        return
-
-    # Successful robbery (80% chance)
-    percentage = random.uniform(0.6, 1.0)
-    stolen_amount = int(target_data['cash_balance'] * percentage)
-    
-    # Update balances in database
-    db.update_balance(target_id, cash_change=-stolen_amount)
-    db.update_balance(robber_id, cash_change=stolen_amount)
-    db.update_robbery_stats(robber_id, amount_stolen=stolen_amount, success=True)
-    
-    # Get updated robber data and stats
-    updated_robber = db.get_user(robber_id)
-    robbery_stats = db.get_robbery_stats(robber_id)
-
-    embed = discord.Embed(
-        title="🦹‍♂️ Successful Robbery!",
-        description=f"You stole ${stolen_amount:,} from {target.mention}!",
-        color=discord.Color.green()
-    )
-    embed.add_field(
-        name="💰 Your New Cash Balance",
-        value=f"${updated_robber['cash_balance']:,}",
-        inline=False
-    )
-    embed.add_field(
-        name="📊 Total Amount Stolen",
-        value=f"${robbery_stats['total_stolen']:,}",
-        inline=False
-    )
-    
-    await ctx.send(embed=embed)
 
 @bot.command(name='pay')
 async def pay(ctx, target: discord.Member = None, amount: str = None):
     if target is None or amount is None:
-        embed = discord.Embed(
-            title="ℹ️ Pay Help",
-            description="Pay another player from your cash balance!",
-            color=discord.Color.blue()
-        )
-        embed.add_field(
-            name="Usage",
-            value="!pay @username <amount>\n!pay @username all",
-            inline=False
-        )
-        embed.add_field(
-            name="Example",
-            value="!pay @JohnDoe 1000\n!pay @JohnDoe all",
-            inline=False
-        )
-        await ctx.send(embed=embed)
+        await ctx.send(embed=embeds.get('pay_help'))
         return
 
     payer_id = str(ctx.author.id)
     receiver_id = str(target.id)
     
-    # Get data for both users
-    payer_data = db.get_user(payer_id)
-    receiver_data = db.get_user(receiver_id)
+    # Hold the lock from the balance check until the balance is updated
+    async with user_locks.hold(payer_id, receiver_id):
+        # Get data for both users
+        payer_data = await accounts.get_user(payer_id)
+        receiver_data = await accounts.get_user(receiver_id)
 
-    # Can't pay yourself
-    if payer_id == receiver_id:
-        embed = discord.Embed(
-            title="🤦‍♂️ Bruh",
-            description="You can't pay yourself!",
-            color=discord.Color.red()
-        )
-        await ctx.send(embed=embed)
-        return
+        # Can't pay yourself
+        if payer_id == receiver_id:
+            embed = discord.Embed(
+                title="🤦‍♂️ Bruh",
+                description="You can't pay yourself!",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
 
-    # Handle 'all' case
-    if amount.lower() == 'all':
-        amount = payer_data['cash_balance']
-    else:
-        try:
-            amount = int(amount)
-        except ValueError:
+        # Cash held by running games can't be paid away
+        cash = escrow.available(payer_data)
+
+        # Handle 'all' case
+        if amount.lower() == 'all':
+            amount = cash
+        else:
+            try:
+                amount = int(amount)
+            except ValueError:
+                await ctx.send(embed=embeds.get('amount_not_a_number'))
+                return
+
+        if amount <= 0:
+            await ctx.send(embed=embeds.get('amount_not_positive'))
+            return
+
+        if amount > cash:
             embed = discord.Embed(
-                title="❌ Invalid Amount",
-                description="Amount must be a number or 'all'!",
+                title="❌ Insufficient Cash",
+                description=f"You only have ${cash:,} in cash!",
                 color=discord.Color.red()
             )
             await ctx.send(embed=embed)
             return
 
-    if amount <= 0:
-        embed = discord.Embed(
-            title="❌ Invalid Amount",
-            description="Amount must be greater than 0!",
-            color=discord.Color.red()
-        )
-        await ctx.send(embed=embed)
-        return
+        # Process payment through database, holding the amount until it has moved
+        escrow.hold(payer_id, amount)
+        try:
+            result = await accounts.transfer(payer_id, receiver_id, amount)
+        finally:
+            escrow.release(payer_id, amount)
+        if result is None:
+            embed = discord.Embed(
+                title="❌ Insufficient Cash",
+                description="Your cash changed before the payment went through. Please try again.",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+        
+        updated_payer, updated_receiver = result
 
-    if amount > payer_data['cash_balance']:
         embed = discord.Embed(
-            title="❌ Insufficient Cash",
-            description=f"You only have ${payer_data['cash_balance']:,} in cash!",
-            color=discord.Color.red()
+            title="💸 Payment Successful",
+            description=f"You paid ${amount:,} to {target.mention}!",
+            color=discord.Color.green()
         )
+        embed.add_field(name="💵 Your New Cash Balance", value=f"${updated_payer['cash_balance']:,}", inline=True)
+        embed.add_field(name="💰 Their New Cash Balance", value=f"${updated_receiver['cash_balance']:,}", inline=True)
+        
         await ctx.send(embed=embed)
-        return
-
-    # Process payment through database
-    db.update_balance(payer_id, cash_change=-amount)
-    db.update_balance(receiver_id, cash_change=amount)
-    
-    # Get updated data
-    updated_payer = db.get_user(payer_id)
-    updated_receiver = db.get_user(receiver_id)
-
-    embed = discord.Embed(
-        title="💸 Payment Successful",
-        description=f"You paid ${amount:,} to {target.mention}!",
-        color=discord.Color.green()
-    )
-    embed.add_field(name="💵 Your New Cash Balance", value=f"${updated_payer['cash_balance']:,}", inline=True)
-    embed.add_field(name="💰 Their New Cash Balance", value=f"${updated_receiver['cash_balance']:,}", inline=True)
-    
-    await ctx.send(embed=embed)
 
 @bot.command(name='lottery', aliases=['lot'])
 async def lottery(ctx, action: str = None, amount: str = None):
@@ -1341,23 +1233,22 @@ async def lottery(ctx, action: str = None, amount: str = None):
     current_time = datetime.now()
     
     # Get user and lottery data from database
-    user_data = db.get_user(user_id)
-    lottery_data = db.get_lottery_info()
+    user_data = await accounts.get_user(user_id)
+    lottery_data = await db.get_lottery_info()
     
     if action is None:
         # Show lottery status
-        last_draw = lottery_data.get('last_draw')
-        if not last_draw:
+        scheduled_draw = lottery_data.get('next_draw')
+        if not scheduled_draw:
             next_draw = "First draw pending"
         else:
-            last_draw = datetime.fromisoformat(last_draw)
-            time_until_draw = timedelta(days=1) - (current_time - last_draw)
+            time_until_draw = max(datetime.fromisoformat(scheduled_draw) - current_time, timedelta(0))
             hours = int(time_until_draw.total_seconds() / 3600)
             minutes = int((time_until_draw.total_seconds() % 3600) / 60)
             next_draw = f"In {hours} hours and {minutes} minutes"
         
         # Get user's tickets
-        tickets = lottery_data['tickets'].get(user_id, [])
+        ticket_count = await db.count_user_tickets(user_id)
         
         embed = discord.Embed(
             title="🎟️ Lottery Status",
@@ -1366,12 +1257,12 @@ async def lottery(ctx, action: str = None, amount: str = None):
         )
         embed.add_field(
             name="🏆 Current Jackpot",
-            value=f"${lottery_data['jackpot']:,}",
+            value=f"${lottery_data['jackpot'] + jackpot.pending_total():,}",
             inline=False
         )
         embed.add_field(
             name="🎫 Your Tickets",
-            value=f"You have {len(tickets)} tickets",
+            value=f"You have {ticket_count} tickets",
             inline=False
         )
         embed.add_field(
@@ -1417,64 +1308,64 @@ async def lottery(ctx, action: str = None, amount: str = None):
         
         total_cost = num_tickets * LOTTERY_TICKET_PRICE
         
-        if total_cost > user_data['cash_balance']:
-            embed = discord.Embed(
-                title="❌ Insufficient Cash",
-                description=f"You need ${total_cost:,} to buy {num_tickets} tickets!",
-                color=discord.Color.red()
-            )
-            await ctx.send(embed=embed)
-            return
-        
-        try:
-            # Generate tickets
-            new_tickets = [random.randint(1, 99) for _ in range(num_tickets)]
-            
-            # Update database atomically
-            db.update_balance(user_id, cash_change=-total_cost)
-            db.add_tickets(user_id, new_tickets)
-            
-            # Update jackpot (50% of ticket cost goes to jackpot)
-            current_jackpot = lottery_data['jackpot']
-            db.update_lottery(jackpot=current_jackpot + total_cost // 2)
-            
-            # Get updated data
-            updated_data = db.get_user(user_id)
-            
-            embed = discord.Embed(
-                title="🎫 Tickets Purchased!",
-                description=f"You bought {num_tickets} lottery tickets!",
-                color=discord.Color.green()
-            )
-            embed.add_field(
-                name="🔢 Your New Numbers",
-                value=", ".join(str(num) for num in new_tickets),
-                inline=False
-            )
-            embed.add_field(
-                name="💰 New Balance",
-                value=f"${updated_data['cash_balance']:,}",
-                inline=False
-            )
-            await ctx.send(embed=embed)
+        # Hold the lock from the balance check until the balance is updated
+        async with user_locks.hold(user_id):
+            user_data = await accounts.get_user(user_id)
+            if total_cost > escrow.available(user_data):
+                embed = discord.Embed(
+                    title="❌ Insufficient Cash",
+                    description=f"You need ${total_cost:,} to buy {num_tickets} tickets!",
+                    color=discord.Color.red()
+                )
+                await ctx.send(embed=embed)
+                return
             
-        except Exception as e:
-            print(f"Error buying lottery tickets: {e}")
-            # Try to refund the user if something went wrong
             try:
-                db.update_balance(user_id, cash_change=total_cost)
-            except:
-                pass
-            embed = discord.Embed(
-                title="❌ Error",
-                description="There was an error buying tickets. Please try again.",
-                color=discord.Color.red()
-            )
-            await ctx.send(embed=embed)
-            return
+                # Generate tickets as {number: count}, however many were bought
+                new_tickets = pick_numbers(num_tickets)
+                
+                # Update database atomically
+                updated_data = await accounts.update_balance(user_id, cash_change=-total_cost)
+                await db.add_tickets(user_id, new_tickets)
+                
+                # Update jackpot (50% of ticket cost goes to jackpot)
+                jackpot.add(total_cost // 2, 'lottery')
+                
+                embed = discord.Embed(
+                    title="🎫 Tickets Purchased!",
+                    description=f"You bought {num_tickets} lottery tickets!",
+                    color=discord.Color.green()
+                )
+                for name, value in format_ticket_counts(new_tickets):
+                    embed.add_field(
+                        name=f"🔢 Your New {name}",
+                        value=value,
+                        inline=False
+                    )
+                embed.add_field(
+                    name="💰 New Balance",
+                    value=f"${updated_data['cash_balance']:,}",
+                    inline=False
+                )
+                await ctx.send(embed=embed)
+                
+            except Exception as e:
+                print(f"Error buying lottery tickets: {e}")
+                # Try to refund the user if something went wrong
+                try:
+                    await accounts.update_balance(user_id, cash_change=total_cost)
+                except:
+                    pass
+                embed = discord.Embed(
+                    title="❌ Error",
+                    description="There was an error buying tickets. Please try again.",
+                    color=discord.Color.red()
+                )
+                await ctx.send(embed=embed)
+                return
         
     elif action.lower() == 'numbers':
-        tickets = lottery_data['tickets'].get(user_id, [])
+        tickets = await db.get_user_tickets(user_id)
         if not tickets:
             embed = discord.Embed(
                 title="❌ No Tickets",
@@ -1486,234 +1377,230 @@ async def lottery(ctx, action: str = None, amount: str = None):
         
         embed = discord.Embed(
             title="🎫 Your Lottery Numbers",
-            description="Here are all your active tickets:",
+            description=f"You hold {sum(tickets.values()):,} tickets (number ×count):",
             color=discord.Color.blue()
         )
         
-        # Split numbers into groups of 10 for readability
-        chunks = [tickets[i:i + 10] for i in range(0, len(tickets), 10)]
-
-        for i, chunk in enumerate(chunks, 1):
-            embed.add_field(
-                name=f"Tickets {(i-1)*10 + 1}-{(i-1)*10 + len(chunk)}",
-                value=", ".join(str(num) for num in chunk),
-                inline=False
-            )
+        for name, value in format_ticket_counts(tickets):
+            embed.add_field(name=name, value=value, inline=False)
         
         await ctx.send(embed=embed)
 
-async def lottery_draw_loop():
+async def run_lottery_draw(deadline):
+    # Announcements need the guild list
     await bot.wait_until_ready()
-    while not bot.is_closed():
-        current_time = datetime.now()
-        
-        # Get lottery data
-        lottery_data = db.get_lottery_info()
-        last_draw = lottery_data.get('last_draw')
-        
-        # Initialize last_draw if it's None
-        if not last_draw:
-            db.reset_lottery()
-            await asyncio.sleep(3600)
-            continue
-            
-        last_draw = datetime.fromisoformat(last_draw)
-        
-        # Check if 24 hours have passed since last draw
-        if current_time - last_draw >= timedelta(days=1):
-            # Perform lottery draw
-            winning_number = random.randint(1, 99)
-            winners = []
-            
-            # Check all tickets
-            for user_id, tickets in lottery_data['tickets'].items():
-                if winning_number in tickets:
-                    winners.append(user_id)
-            
-            # Calculate prize
-            if winners:
-                prize_per_winner = lottery_data['jackpot'] // len(winners)
-                # Pay winners
-                for winner_id in winners:
-                    db.update_balance(winner_id, cash_change=prize_per_winner)
-                    
-                    try:
-                        winner = await bot.fetch_user(int(winner_id))
-                        embed = discord.Embed(
-                            title="🎉 Lottery Winner!",
-                            description=f"Congratulations! Your number {winning_number} won!",
-                            color=discord.Color.gold()
-                        )
-                        embed.add_field(
-                            name="💰 Prize",
-                            value=f"${prize_per_winner:,}",
-                            inline=False
-                        )
-                        await winner.send(embed=embed)
-                    except:
-                        pass  # In case DM fails
-            
-            # Reset lottery
-            db.reset_lottery()
-            
-            # Announce results in all guilds
-            for guild in bot.guilds:
-                try:
-                    embed = discord.Embed(
-                        title="🎲 Daily Lottery Results",
-                        description=f"The winning number was: {winning_number}",
-                        color=discord.Color.blue()
-                    )
-                    
-                    if winners:
-                        winners_text = []
-                        for winner_id in winners:
-                            try:
-                                winner = await bot.fetch_user(int(winner_id))
-                                winners_text.append(winner.name)
-                            except:
-                                winners_text.append("Unknown User")
-                        
-                        embed.add_field(
-                            name="🏆 Winners",
-                            value="\n".join(winners_text),
-                            inline=False
-                        )
-                        embed.add_field(
-                            name="💰 Prize Per Winner",
-                            value=f"${prize_per_winner:,}",
-                            inline=False
-                        )
-                    else:
-                        embed.add_field(
-                            name="😢 No Winners",
-                            value="Better luck next time!",
-                            inline=False
-                        )
-                    
-                    # Try to find a general channel to announce in
-                    announcement_channel = None
-                    for channel in guild.text_channels:
-                        if channel.permissions_for(guild.me).send_messages:
-                            announcement_channel = channel
-                            break
-                    
-                    if announcement_channel:
-                        await announcement_channel.send(embed=embed)
-                except:
-                    continue  # Skip if we can't announce in this guild
+    
+    # Fold pending contributions in before the prize is read
+    await jackpot.flush()
+    lottery_data = await db.get_lottery_info()
+    
+    # Perform lottery draw
+    winning_number = random.randint(1, 99)
+    
+    # Keep the schedule anchored to the original draw time, skipping draws missed while offline
+    next_draw = deadline + LOTTERY_DRAW_INTERVAL
+    while next_draw <= datetime.now():
+        next_draw += LOTTERY_DRAW_INTERVAL
+    
+    # Find and pay winners and reset lottery in one transaction; None means this draw already ran
+    completed = await accounts.apply_direct(
+        db.complete_draw(lottery_data['draw_id'], winning_number, lottery_data['jackpot'], next_draw),
+        lambda result: [(winner_id, result[1]) for winner_id in result[0]]
+    )
+    if not completed:
+        return
+    winners, prize_per_winner = completed
+    
+    if winners:
+        embed = discord.Embed(
+            title="🎉 Lottery Winner!",
+            description=f"Congratulations! Your number {winning_number} won!",
+            color=discord.Color.gold()
+        )
+        embed.add_field(
+            name="💰 Prize",
+            value=f"${prize_per_winner:,}",
+            inline=False
+        )
+        # Delivered in the background so announcements don't wait on DMs
+        await outbox.send_many(winners, embed=embed)
+    
+    # Look winners up once and build a single embed for every guild
+    embed = discord.Embed(
+        title="🎲 Daily Lottery Results",
+        description=f"The winning number was: {winning_number}",
+        color=discord.Color.blue()
+    )
+    
+    if winners:
+        winner_names = await names.resolve(winners)
+        winners_text = [winner_names[winner_id] for winner_id in winners]
         
-        # Wait for 1 hour before checking again
-        await asyncio.sleep(3600)
+        embed.add_field(
+            name="🏆 Winners",
+            value="\n".join(winners_text),
+            inline=False
+        )
+        embed.add_field(
+            name="💰 Prize Per Winner",
+            value=f"${prize_per_winner:,}",
+            inline=False
+        )
+    else:
+        embed.add_field(
+            name="😢 No Winners",
+            value="Better luck next time!",
+            inline=False
+        )
+    
+    # Announce results in all guilds
+    await broadcaster.broadcast(embed=embed)
+
+lottery_scheduler = DeadlineScheduler(
+    lambda: db.get_next_draw(LOTTERY_DRAW_INTERVAL),
+    run_lottery_draw,
+    name='lottery draw'
+)
+
+# Seconds an RPS challenge or game waits for the next click
+RPS_TIMEOUT = 60
+
+RPS_EMOJI = {
+    "rock": "🪨",
+    "paper": "📄",
+    "scissors": "✂️"
+}
 
 class RPSView(discord.ui.View):
-    def __init__(self, challenger, opponent, bet):
-        super().__init__(timeout=60)
-        self.challenger = challenger
-        self.opponent = opponent
-        self.bet = bet
-        self.challenger_choice = None
-        self.opponent_choice = None
-        self.accepted = False
-    
-    @discord.ui.button(label="Accept ✅", style=discord.ButtonStyle.green)
+    """Buttons for every RPS game; state lives in the session store keyed by message id"""
+
+    def __init__(self, stage=None, disabled=False):
+        super().__init__(timeout=None)
+        # stage picks the buttons a message shows: 'challenge' (accept/decline), 'choose'
+        # (rock/paper/scissors), or None for the registered instance handling every click
+        if stage == 'challenge':
+            for item in (self.rock_button_callback, self.paper_button_callback, self.scissors_button_callback):
+                self.remove_item(item)
+        elif stage == 'choose':
+            self.remove_item(self.accept_button)
+            self.remove_item(self.decline_button)
+        if stage is not None:
+            # Attached to a message only; clicks reach the registered instance by custom_id
+            for child in self.children:
+                child.disabled = disabled
+            self.stop()
+    
+    async def _load(self, interaction):
+        session = sessions.get(interaction.message.id, 'rps')
+        if session is None:
+            await interaction.response.send_message("This game has ended!", ephemeral=True)
+            return None
+        return session['state']
+    
+    @discord.ui.button(label="Accept ✅", style=discord.ButtonStyle.green, custom_id='rps:accept')
     async def accept_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if interaction.user.id != self.opponent.id:
+        state = await self._load(interaction)
+        if state is None:
+            return
+        if interaction.user.id != state['opponent_id']:
             await interaction.response.send_message("Only the challenged player can accept!", ephemeral=True)
             return
             
         # Check if opponent has enough money
-        opponent_data = db.get_user(str(self.opponent.id))
-        if opponent_data['cash_balance'] < self.bet:
+        opponent_data = await accounts.get_user(str(state['opponent_id']))
+        cash = escrow.available(opponent_data)
+        if cash < state['bet']:
             await interaction.response.send_message(
-                f"You need ${self.bet:,} in cash to accept this challenge, but you only have ${opponent_data['cash_balance']:,}!",
+                f"You need ${state['bet']:,} in cash to accept this challenge, but you only have ${cash:,}!",
                 ephemeral=True
             )
             return
-            
-        self.accepted = True
-        
-        # Clear all buttons first
-        self.clear_items()
         
-        # Add game buttons using the callback decorators
-        self.add_item(self.rock_button_callback)
-        self.add_item(self.paper_button_callback)
-        self.add_item(self.scissors_button_callback)
+        if state['accepted']:
+            await interaction.response.send_message("This challenge was already accepted!", ephemeral=True)
+            return
+        state['accepted'] = True
+        escrow.hold(state['opponent_id'], state['bet'])
+        await sessions.update(interaction.message.id, RPS_TIMEOUT)
         
         embed = discord.Embed(
             title="🎮 Rock Paper Scissors Game",
-            description=f"Game accepted! Make your choices!\nBet amount: ${self.bet:,}",
+            description=f"Game accepted! Make your choices!\nBet amount: ${state['bet']:,}",
             color=discord.Color.green()
         )
-        await interaction.response.edit_message(embed=embed, view=self)
+        await interaction.response.edit_message(embed=embed, view=RPSView('choose'))
     
-    @discord.ui.button(label="Decline ❌", style=discord.ButtonStyle.red)
+    @discord.ui.button(label="Decline ❌", style=discord.ButtonStyle.red, custom_id='rps:decline')
     async def decline_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if interaction.user.id != self.opponent.id:
+        state = await self._load(interaction)
+        if state is None:
+            return
+        if interaction.user.id != state['opponent_id']:
             await interaction.response.send_message("Only the challenged player can decline!", ephemeral=True)
             return
+        if state['accepted']:
+            await interaction.response.send_message("This challenge was already accepted!", ephemeral=True)
+            return
+        await sessions.delete(interaction.message.id)
+        escrow.release(state['challenger_id'], state['bet'])
             
         embed = discord.Embed(
             title="❌ Challenge Declined",
-            description=f"{self.opponent.mention} declined the challenge!",
+            description=f"<@{state['opponent_id']}> declined the challenge!",
             color=discord.Color.red()
         )
-        
-        for child in self.children:
-            child.disabled = True
-        await interaction.response.edit_message(embed=embed, view=self)
-        self.stop()
-    
-    async def interaction_check(self, interaction: discord.Interaction) -> bool:
-        if not self.accepted:
-            return True
-        if interaction.user.id not in [self.challenger.id, self.opponent.id]:
-            await interaction.response.send_message("You're not part of this game!", ephemeral=True)
-            return False
-        return True
+        await interaction.response.edit_message(embed=embed, view=RPSView('challenge', disabled=True))
     
-    @discord.ui.button(label="Rock 🪨", style=discord.ButtonStyle.gray)
+    @discord.ui.button(label="Rock 🪨", style=discord.ButtonStyle.gray, custom_id='rps:rock')
     async def rock_button_callback(self, interaction: discord.Interaction, button: discord.ui.Button):
         await self.make_choice(interaction, "rock")
     
-    @discord.ui.button(label="Paper 📄", style=discord.ButtonStyle.gray)
+    @discord.ui.button(label="Paper 📄", style=discord.ButtonStyle.gray, custom_id='rps:paper')
     async def paper_button_callback(self, interaction: discord.Interaction, button: discord.ui.Button):
         await self.make_choice(interaction, "paper")
     
-    @discord.ui.button(label="Scissors ✂️", style=discord.ButtonStyle.gray)
+    @discord.ui.button(label="Scissors ✂️", style=discord.ButtonStyle.gray, custom_id='rps:scissors')
     async def scissors_button_callback(self, interaction: discord.Interaction, button: discord.ui.Button):
         await self.make_choice(interaction, "scissors")
     
     async def make_choice(self, interaction: discord.Interaction, choice):
-        if not self.accepted:
+        state = await self._load(interaction)
+        if state is None:
+            return
+        if interaction.user.id not in (state['challenger_id'], state['opponent_id']):
+            await interaction.response.send_message("You're not part of this game!", ephemeral=True)
+            return
+        if not state['accepted']:
             await interaction.response.send_message("Wait for the challenge to be accepted!", ephemeral=True)
             return
-            
-        user_id = str(interaction.user.id)
         
-        if user_id == str(self.challenger.id) and self.challenger_choice is None:
-            self.challenger_choice = choice
-            await interaction.response.send_message(f"You chose {choice}!", ephemeral=True)
-        elif user_id == str(self.opponent.id) and self.opponent_choice is None:
-            self.opponent_choice = choice
-            await interaction.response.send_message(f"You chose {choice}!", ephemeral=True)
+        if interaction.user.id == state['challenger_id'] and state['challenger_choice'] is None:
+            state['challenger_choice'] = choice
+        elif interaction.user.id == state['opponent_id'] and state['opponent_choice'] is None:
+            state['opponent_choice'] = choice
         else:
             await interaction.response.send_message("You've already made your choice!", ephemeral=True)
             return
         
         # If both players have made their choices, determine the winner
-        if self.challenger_choice and self.opponent_choice:
-            await self.end_game(interaction)
+        if state['challenger_choice'] and state['opponent_choice']:
+            await sessions.delete(interaction.message.id)
+            await interaction.response.send_message(f"You chose {choice}!", ephemeral=True)
+            await self.end_game(interaction, state)
+        else:
+            await sessions.update(interaction.message.id, RPS_TIMEOUT)
+            await interaction.response.send_message(f"You chose {choice}!", ephemeral=True)
     
-    async def end_game(self, interaction):
-        # Disable all buttons
-        for child in self.children:
-            child.disabled = True
+    async def end_game(self, interaction, state):
+        challenger_id = str(state['challenger_id'])
+        opponent_id = str(state['opponent_id'])
+        challenger_choice = state['challenger_choice']
+        opponent_choice = state['opponent_choice']
+        bet = state['bet']
         
         # Determine winner
-        winner = None
-        if self.challenger_choice == self.opponent_choice:
+        winner_id = None
+        if challenger_choice == opponent_choice:
             result = "It's a tie!"
         else:
             winning_combinations = {
@@ -1721,12 +1608,11 @@ class RPSView(discord.ui.View):
                 "paper": "rock",
                 "scissors": "paper"
             }
-            if winning_combinations[self.challenger_choice] == self.opponent_choice:
-                winner = self.challenger
-                result = f"{self.challenger.mention} wins!"
+            if winning_combinations[challenger_choice] == opponent_choice:
+                winner_id, winner_name = challenger_id, state['challenger_name']
             else:
-                winner = self.opponent
-                result = f"{self.opponent.mention} wins!"
+                winner_id, winner_name = opponent_id, state['opponent_name']
+            result = f"<@{winner_id}> wins!"
         
         # Create result embed
         embed = discord.Embed(
@@ -1735,31 +1621,29 @@ class RPSView(discord.ui.View):
             color=discord.Color.gold()
         )
         embed.add_field(
-            name=f"{self.challenger.name}'s Choice",
-            value=f"{self.challenger_choice.capitalize()} {self.get_emoji(self.challenger_choice)}",
+            name=f"{state['challenger_name']}'s Choice",
+            value=f"{challenger_choice.capitalize()} {RPS_EMOJI[challenger_choice]}",
             inline=True
         )
         embed.add_field(
-            name=f"{self.opponent.name}'s Choice",
-            value=f"{self.opponent_choice.capitalize()} {self.get_emoji(self.opponent_choice)}",
+            name=f"{state['opponent_name']}'s Choice",
+            value=f"{opponent_choice.capitalize()} {RPS_EMOJI[opponent_choice]}",
             inline=True
         )
         
-        # Handle bet
-        challenger_id = str(self.challenger.id)
-        opponent_id = str(self.opponent.id)
-        
-        if winner:
-            winner_id = str(winner.id)
+        # Settle both held bets in one go; a tie just releases them
+        if winner_id:
             loser_id = opponent_id if winner_id == challenger_id else challenger_id
-            
-            # Transfer money through database
-            db.update_balance(winner_id, cash_change=self.bet)
-            db.update_balance(loser_id, cash_change=-self.bet)
-            
+            results = [(loser_id, bet, -bet), (winner_id, bet, bet)]
+        else:
+            results = [(challenger_id, bet, 0), (opponent_id, bet, 0)]
+        async with user_locks.hold(challenger_id, opponent_id):
+            await escrow.settle(results)
+        
+        if winner_id:
             embed.add_field(
                 name="💰 Bet Result",
-                value=f"{winner.name} won ${self.bet:,}!",
+                value=f"{winner_name} won ${bet:,}!",
                 inline=False
             )
         else:
@@ -1769,71 +1653,50 @@ class RPSView(discord.ui.View):
                 inline=False
             )
         
-        await interaction.message.edit(embed=embed, view=self)
-        self.stop()
-    
-    def get_emoji(self, choice):
-        emojis = {
-            "rock": "🪨",
-            "paper": "📄",
-            "scissors": "✂️"
-        }
-        return emojis.get(choice, "")
-    
-    async def on_timeout(self):
-        if not self.accepted:
+        await interaction.message.edit(embed=embed, view=RPSView('choose', disabled=True))
+    
+    async def expire(self, message_id, session):
+        """Session store callback for challenges and games left idle past RPS_TIMEOUT"""
+        state = session['state']
+        escrow.release(state['challenger_id'], state['bet'])
+        if not state['accepted']:
             embed = discord.Embed(
                 title="⏰ Challenge Expired",
-                description=f"{self.opponent.mention} didn't respond in time!",
+                description=f"<@{state['opponent_id']}> didn't respond in time!",
                 color=discord.Color.red()
             )
-        elif not (self.challenger_choice and self.opponent_choice):
+            view = RPSView('challenge', disabled=True)
+        else:
             embed = discord.Embed(
                 title="⏰ Game Timed Out",
                 description="One or both players didn't make a choice in time!",
                 color=discord.Color.red()
             )
-            # Return bets
-            challenger_id = str(self.challenger.id)
-            opponent_id = str(self.opponent.id)
-            # Return bets through database
-            db.update_balance(challenger_id, cash_change=self.bet)
-            db.update_balance(opponent_id, cash_change=self.bet)
+            # Bets were only held, so returning them needs no write
+            escrow.release(state['opponent_id'], state['bet'])
             embed.add_field(
                 name="💰 Bets Returned",
                 value="All bets have been returned to players.",
                 inline=False
             )
+            view = RPSView('choose', disabled=True)
         
-        for child in self.children:
-            child.disabled = True
-        try:
-            await self.message.edit(embed=embed, view=self)
-        except:
-            pass
-        self.stop()
+        channel = bot.get_partial_messageable(session['channel_id'])
+        await channel.get_partial_message(message_id).edit(embed=embed, view=view)
+    
+    def restore(self, session):
+        """Hold the bets again for a game that was running when the bot stopped"""
+        state = session['state']
+        escrow.hold(state['challenger_id'], state['bet'])
+        if state['accepted']:
+            escrow.hold(state['opponent_id'], state['bet'])
 
 @bot.command(name='rps')
 async def rps(ctx, opponent: discord.Member = None, bet: str = None):
     challenger_id = str(ctx.author.id)
     
     if opponent is None or bet is None:
-        embed = discord.Embed(
-            title="🎮 Rock Paper Scissors Help",
-            description="Challenge someone to a game of Rock Paper Scissors!",
-            color=discord.Color.blue()
-        )
-        embed.add_field(
-            name="Usage",
-            value="!rps @player <bet_amount>\n!rps @player all",
-            inline=False
-        )
-        embed.add_field(
-            name="Example",
-            value="!rps @JohnDoe 1000\n!rps @JohnDoe all",
-            inline=False
-        )
-        await ctx.send(embed=embed)
+        await ctx.send(embed=embeds.get('rps_help'))
         return
     
     if opponent.id == ctx.author.id:
@@ -1846,9 +1709,10 @@ async def rps(ctx, opponent: discord.Member = None, bet: str = None):
         return
     
     # Handle bet
-    challenger_data = db.get_user(challenger_id)
+    challenger_data = await accounts.get_user(challenger_id)
+    cash = escrow.available(challenger_data)
     if bet.lower() == 'all':
-        bet_amount = challenger_data['cash_balance']
+        bet_amount = cash
     else:
         try:
             bet_amount = int(bet)
@@ -1864,18 +1728,18 @@ async def rps(ctx, opponent: discord.Member = None, bet: str = None):
             return
         
     # Check if challenger has enough money
-    if challenger_data['cash_balance'] < bet_amount:
+    if cash < bet_amount:
         embed = discord.Embed(
             title="❌ Insufficient Funds",
-            description=f"You need ${bet_amount:,} in cash, but you only have ${challenger_data['cash_balance']:,}!",
+            description=f"You need ${bet_amount:,} in cash, but you only have ${cash:,}!",
             color=discord.Color.red()
         )
         await ctx.send(embed=embed)
         return
-
-    # Create game view (only with accept/decline buttons initially)
-    view = RPSView(ctx.author, opponent, bet_amount)
     
+    # The challenger's bet is held from now until the game is settled or called off
+    escrow.hold(challenger_id, bet_amount)
+
     embed = discord.Embed(
         title="🎮 Rock Paper Scissors Challenge",
         description=f"{ctx.author.mention} has challenged {opponent.mention} to a game!",
@@ -1894,16 +1758,26 @@ async def rps(ctx, opponent: discord.Member = None, bet: str = None):
         inline=False
     )
     
-    message = await ctx.send(embed=embed, view=view)
-    view.message = message
+    try:
+        # Only accept/decline buttons until the challenge is accepted
+        message = await ctx.send(embed=embed, view=RPSView('challenge'))
+        await sessions.create(message.id, message.channel.id, 'rps', {
+            'challenger_id': ctx.author.id,
+            'challenger_name': ctx.author.name,
+            'opponent_id': opponent.id,
+            'opponent_name': opponent.name,
+            'bet': bet_amount,
+            'accepted': False,
+            'challenger_choice': None,
+            'opponent_choice': None,
+        }, RPS_TIMEOUT)
+    except Exception:
+        escrow.release(challenger_id, bet_amount)
+        raise
 
-<<<<<<< HEAD
 # Keep the bot alive
 keep_alive()
 
 # Run the bot using the token from environment variable
 bot.run(os.getenv('DISCORD_TOKEN')) 
-=======
-# Run the bot
-bot.run(os.getenv('DISCORD_TOKEN')) 
->>>>>>> eb286a3596648d37e71e9d7e19bf9c0c0b111865
+
@@ -0,0 +1,56 @@
+import asyncio
+
+import discord
+
+# Guild announcements in flight at once. discord.py already queues requests
+# per rate-limit bucket (each channel is its own bucket for sends) and honours
+# the global limit, so this only bounds how much work is queued behind them.
+BROADCAST_CONCURRENCY = 16
+
+class Broadcaster:
+    """Sends one message to every guild's announcement channel"""
+
+    def __init__(self, bot, concurrency=BROADCAST_CONCURRENCY):
+        self.bot = bot
+        self.concurrency = concurrency
+        self.channels = {}
+
+    def forget(self, guild_id):
+        """Drop the cached channel for a guild, e.g. after leaving it"""
+        self.channels.pop(guild_id, None)
+
+    def get_channel(self, guild):
+        """The guild's announcement channel, or None if the bot can't post anywhere"""
+        channel = guild.get_channel(self.channels.get(guild.id, 0))
+        if channel is not None and channel.permissions_for(guild.me).send_messages:
+            return channel
+
+        for channel in guild.text_channels:
+            if channel.permissions_for(guild.me).send_messages:
+                self.channels[guild.id] = channel.id
+                return channel
+        self.forget(guild.id)
+        return None
+
+    async def broadcast(self, guilds=None, **kwargs):
+        """Send kwargs (embed=..., content=...) to every guild; returns how many got it"""
+        guilds = self.bot.guilds if guilds is None else guilds
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def send(guild):
+            channel = self.get_channel(guild)
+            if channel is None:
+                return False
+            async with semaphore:
+                try:
+                    await channel.send(**kwargs)
+                    return True
+                except (discord.Forbidden, discord.NotFound):
+                    # Pick a different channel next time
+                    self.forget(guild.id)
+                except discord.HTTPException as e:
+                    print(f"Error announcing in guild {guild.id}: {e}")
+                return False
+
+        results = await asyncio.gather(*(send(guild) for guild in guilds))
+        return sum(results)
@@ -0,0 +1,65 @@
+import time
+
+from periodic import PeriodicTask
+
+# Cooldown kinds and their durations in seconds. !work and !97ab share 'work'.
+COOLDOWNS = {
+    'work': 3600,
+    'crime': 3600,
+}
+# Seconds between writes of new cooldowns to the database
+FLUSH_INTERVAL = 5
+
+class CooldownService:
+    """Per-user cooldowns kept in memory as epoch seconds of the last use, written back in batches"""
+
+    def __init__(self, db, flush_interval=FLUSH_INTERVAL):
+        self.db = db
+        self.used = {}
+        self.dirty = {}
+        self.flusher = PeriodicTask(self.flush, flush_interval, 'flushing cooldowns')
+
+    async def start(self):
+        """Load every stored cooldown and start the background flush loop"""
+        if self.flusher.task is not None:
+            return
+        for user_id, kind, used_at in await self.db.get_cooldowns():
+            self.used[(user_id, kind)] = used_at
+        self.flusher.start()
+
+    async def close(self):
+        """Stop the background loop and write everything still pending"""
+        await self.flusher.stop()
+        await self.flush()
+
+    def remaining(self, user_id, kind):
+        """Seconds until kind is available again for user_id, 0 if it is now"""
+        used_at = self.used.get((str(user_id), kind))
+        if used_at is None:
+            return 0
+        return max(0, used_at + COOLDOWNS[kind] - int(time.time()))
+
+    def try_use(self, user_id, kind):
+        """Start the cooldown if it has run out; returns the seconds left otherwise.
+
+        Check and set happen without an await in between, so two commands
+        racing for the same cooldown can't both get through.
+        """
+        remaining = self.remaining(user_id, kind)
+        if remaining:
+            return remaining
+        key = (str(user_id), kind)
+        self.used[key] = self.dirty[key] = int(time.time())
+        return 0
+
+    async def flush(self):
+        """Write cooldowns used since the last flush"""
+        if not self.dirty:
+            return
+        batch, self.dirty = self.dirty, {}
+        try:
+            await self.db.save_cooldowns([(user_id, kind, used_at) for (user_id, kind), used_at in batch.items()])
+        except BaseException:
+            # Keep newer uses that happened while the write was failing or cancelled
+            self.dirty = {**batch, **self.dirty}
+            raise
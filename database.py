@@ -1,42 +1,161 @@
-import sqlite3
+import aiosqlite
+import asyncio
+from collections import Counter
+from contextlib import asynccontextmanager
 from datetime import datetime
 import json
 
+# Size of sqlite3's per-connection prepared statement cache
+STATEMENT_CACHE_SIZE = 256
+
+USER_COLUMNS = 'user_id, cash_balance, bank_balance, last_work, last_crime'
+
 class Database:
     def __init__(self, db_file="casino.db"):
         self.db_file = db_file
-        self.setup_database()
+        self.conn = None
+        self.lock = asyncio.Lock()
+
+    async def connect(self):
+        """Open the shared connection and tune it for many small writes"""
+        if self.conn is not None:
+            return
+        self.conn = await aiosqlite.connect(self.db_file, cached_statements=STATEMENT_CACHE_SIZE)
+        # WAL lets readers run alongside the writer and only needs an fsync at checkpoints
+        await self.conn.execute('PRAGMA journal_mode=WAL')
+        await self.conn.execute('PRAGMA synchronous=NORMAL')
 
-    def get_connection(self):
-        return sqlite3.connect(self.db_file)
+    async def close(self):
+        """Close the shared connection"""
+        if self.conn is None:
+            return
+        async with self.lock:
+            await self.conn.close()
+            self.conn = None
 
-    def setup_database(self):
+    @asynccontextmanager
+    async def get_connection(self):
+        """Hand out the shared connection to one coroutine at a time so
+        statements from different commands never end up in the same transaction"""
+        async with self.lock:
+            yield self.conn
+
+    async def setup_database(self):
         """Create all necessary tables if they don't exist"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
+        await self.connect()
+        async with self.get_connection() as conn:
+            cursor = await conn.cursor()
             
             # Create users table for balances
-            cursor.execute('''
+            await cursor.execute('''
                 CREATE TABLE IF NOT EXISTS users (
                     user_id TEXT PRIMARY KEY,
                     cash_balance INTEGER DEFAULT 10000,
                     bank_balance INTEGER DEFAULT 0,
                     last_work TIMESTAMP,
-                    last_crime TIMESTAMP
+                    last_crime TIMESTAMP,
+                    total_wealth INTEGER GENERATED ALWAYS AS (cash_balance + bank_balance) VIRTUAL
                 )
             ''')
             
+            # Databases created before total_wealth existed get it added in place
+            await cursor.execute('PRAGMA table_xinfo(users)')
+            if 'total_wealth' not in [column[1] for column in await cursor.fetchall()]:
+                await cursor.execute(
+                    'ALTER TABLE users ADD COLUMN total_wealth INTEGER '
+                    'GENERATED ALWAYS AS (cash_balance + bank_balance) VIRTUAL'
+                )
+            await cursor.execute(
+                'CREATE INDEX IF NOT EXISTS idx_users_total_wealth ON users (total_wealth DESC, user_id)'
+            )
+            
             # Create lottery table
-            cursor.execute('''
+            await cursor.execute('''
                 CREATE TABLE IF NOT EXISTS lottery (
                     jackpot INTEGER DEFAULT 100000,
                     last_draw TIMESTAMP,
-                    current_tickets TEXT DEFAULT '{}'
+                    current_tickets TEXT DEFAULT '{}',
+                    draw_id INTEGER DEFAULT 1,
+                    next_draw TIMESTAMP
                 )
             ''')
+            await cursor.execute('PRAGMA table_info(lottery)')
+            lottery_columns = [column[1] for column in await cursor.fetchall()]
+            if 'draw_id' not in lottery_columns:
+                await cursor.execute('ALTER TABLE lottery ADD COLUMN draw_id INTEGER DEFAULT 1')
+            if 'next_draw' not in lottery_columns:
+                await cursor.execute('ALTER TABLE lottery ADD COLUMN next_draw TIMESTAMP')
+            await cursor.execute('SELECT COUNT(*) FROM lottery')
+            if (await cursor.fetchone())[0] == 0:
+                await cursor.execute('INSERT INTO lottery (jackpot) VALUES (100000)')
+            
+            # Tables from before ticket counts held one row per ticket; fold them below
+            await cursor.execute('PRAGMA table_info(lottery_tickets)')
+            ticket_columns = [column[1] for column in await cursor.fetchall()]
+            per_ticket_rows = ticket_columns and 'count' not in ticket_columns
+            if per_ticket_rows:
+                await cursor.execute('DROP INDEX IF EXISTS idx_lottery_tickets_number')
+                await cursor.execute('DROP INDEX IF EXISTS idx_lottery_tickets_user')
+                await cursor.execute('ALTER TABLE lottery_tickets RENAME TO lottery_tickets_old')
+            
+            # Create lottery tickets table: how many tickets each user holds per number
+            await cursor.execute('''
+                CREATE TABLE IF NOT EXISTS lottery_tickets (
+                    draw_id INTEGER NOT NULL,
+                    user_id TEXT NOT NULL,
+                    number INTEGER NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (draw_id, user_id, number)
+                ) WITHOUT ROWID
+            ''')
+            await cursor.execute(
+                'CREATE INDEX IF NOT EXISTS idx_lottery_tickets_number ON lottery_tickets (draw_id, number)'
+            )
+            
+            if per_ticket_rows:
+                await cursor.execute('''
+                    INSERT INTO lottery_tickets (draw_id, user_id, number, count)
+                    SELECT draw_id, user_id, number, COUNT(*) FROM lottery_tickets_old
+                    GROUP BY draw_id, user_id, number
+                ''')
+                await cursor.execute('DROP TABLE lottery_tickets_old')
+            
+            # Move tickets still stored in the old JSON blob into the tickets table
+            await cursor.execute('SELECT draw_id, current_tickets FROM lottery')
+            draw_id, blob = await cursor.fetchone()
+            legacy_tickets = json.loads(blob or '{}')
+            for user_id, numbers in legacy_tickets.items():
+                await self._add_ticket_counts(cursor, draw_id, user_id, Counter(numbers))
+            if legacy_tickets:
+                await cursor.execute("UPDATE lottery SET current_tickets = '{}'")
+            
+            # Create cooldowns table; last_work/last_crime on users are only read once to fill it
+            await cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'cooldowns'")
+            migrate_cooldowns = await cursor.fetchone() is None
+            await cursor.execute('''
+                CREATE TABLE IF NOT EXISTS cooldowns (
+                    user_id TEXT,
+                    kind TEXT,
+                    used_at INTEGER,
+                    PRIMARY KEY (user_id, kind)
+                ) WITHOUT ROWID
+            ''')
+            if migrate_cooldowns:
+                await cursor.execute(
+                    'SELECT user_id, last_work, last_crime FROM users WHERE last_work IS NOT NULL OR last_crime IS NOT NULL'
+                )
+                legacy = [
+                    (user_id, kind, int(datetime.fromisoformat(used).timestamp()))
+                    for user_id, last_work, last_crime in await cursor.fetchall()
+                    for kind, used in (('work', last_work), ('crime', last_crime))
+                    if used
+                ]
+                await cursor.executemany(
+                    'INSERT INTO cooldowns (user_id, kind, used_at) VALUES (?, ?, ?)', legacy
+                )
             
             # Create robbery stats table
-            cursor.execute('''
+            await cursor.execute('''
                 CREATE TABLE IF NOT EXISTS robbery_stats (
                     user_id TEXT PRIMARY KEY,
                     total_stolen INTEGER DEFAULT 0,
@@ -45,116 +164,198 @@ class Database:
                 )
             ''')
             
-            conn.commit()
+            # Create outgoing DM queue, so notifications survive restarts
+            await cursor.execute('''
+                CREATE TABLE IF NOT EXISTS dm_outbox (
+                    id INTEGER PRIMARY KEY,
+                    user_id TEXT,
+                    payload TEXT,
+                    attempts INTEGER DEFAULT 0,
+                    next_attempt TEXT
+                )
+            ''')
+            
+            # Create in-flight game sessions, keyed by the message holding the buttons
+            await cursor.execute('''
+                CREATE TABLE IF NOT EXISTS game_sessions (
+                    message_id INTEGER PRIMARY KEY,
+                    channel_id INTEGER,
+                    game TEXT,
+                    state TEXT,
+                    expires_at REAL
+                )
+            ''')
+            
+            await conn.commit()
 
-    def get_user(self, user_id):
+    async def get_user(self, user_id):
         """Get or create user record"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT * FROM users WHERE user_id = ?', (str(user_id),))
-            user = cursor.fetchone()
+        async with self.get_connection() as conn:
+            cursor = await conn.cursor()
+            await cursor.execute(f'SELECT {USER_COLUMNS} FROM users WHERE user_id = ?', (str(user_id),))
+            user = await cursor.fetchone()
             
             if not user:
-                cursor.execute(
+                await cursor.execute(
                     'INSERT INTO users (user_id, cash_balance, bank_balance) VALUES (?, 10000, 0)',
                     (str(user_id),)
                 )
-                conn.commit()
+                await conn.commit()
                 return {'user_id': str(user_id), 'cash_balance': 10000, 'bank_balance': 0}
             
-            return {
-                'user_id': user[0],
-                'cash_balance': user[1],
-                'bank_balance': user[2],
-                'last_work': user[3],
-                'last_crime': user[4]
-            }
+            return self._user_row(user)
 
-    def update_balance(self, user_id, cash_change=0, bank_change=0):
-        """Update user's cash and bank balances"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            if cash_change != 0:
-                cursor.execute(
-                    'UPDATE users SET cash_balance = cash_balance + ? WHERE user_id = ?',
-                    (cash_change, str(user_id))
-                )
-            if bank_change != 0:
-                cursor.execute(
-                    'UPDATE users SET bank_balance = bank_balance + ? WHERE user_id = ?',
-                    (bank_change, str(user_id))
-                )
-            conn.commit()
-
-    def get_cooldown(self, user_id, cooldown_type):
-        """Get last activity timestamp for work or crime"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            column = f'last_{cooldown_type}'
-            cursor.execute(f'SELECT {column} FROM users WHERE user_id = ?', (str(user_id),))
-            result = cursor.fetchone()
-            return result[0] if result and result[0] else None
-
-    def set_cooldown(self, user_id, cooldown_type):
-        """Set cooldown timestamp for work or crime"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            column = f'last_{cooldown_type}'
-            cursor.execute(
-                f'UPDATE users SET {column} = ? WHERE user_id = ?',
-                (datetime.now().isoformat(), str(user_id))
+    def _user_row(self, user):
+        return {
+            'user_id': user[0],
+            'cash_balance': user[1],
+            'bank_balance': user[2],
+            'last_work': user[3],
+            'last_crime': user[4]
+        }
+
+    async def update_balance(self, user_id, cash_change=0, bank_change=0):
+        """Update user's cash and bank balances and return the updated record"""
+        async with self.get_connection() as conn:
+            cursor = await conn.cursor()
+            await cursor.execute(
+                f'''UPDATE users SET cash_balance = cash_balance + ?, bank_balance = bank_balance + ?
+                   WHERE user_id = ? RETURNING {USER_COLUMNS}''',
+                (cash_change, bank_change, str(user_id))
             )
-            conn.commit()
+            user = await cursor.fetchone()
+            await conn.commit()
+            return self._user_row(user) if user else None
 
-    def get_lottery_info(self):
+    async def apply_balance_changes(self, changes):
+        """Apply many (user_id, cash_change, bank_change) deltas with a single commit"""
+        async with self.get_connection() as conn:
+            await conn.executemany(
+                'UPDATE users SET cash_balance = cash_balance + ?, bank_balance = bank_balance + ? WHERE user_id = ?',
+                [(cash_change, bank_change, str(user_id)) for user_id, cash_change, bank_change in changes]
+            )
+            await conn.commit()
+
+    async def get_cooldowns(self):
+        """All cooldowns as (user_id, kind, used_at) with used_at in epoch seconds"""
+        async with self.get_connection() as conn:
+            cursor = await conn.cursor()
+            await cursor.execute('SELECT user_id, kind, used_at FROM cooldowns')
+            return await cursor.fetchall()
+
+    async def save_cooldowns(self, cooldowns):
+        """Upsert (user_id, kind, used_at) rows in one transaction"""
+        async with self.get_connection() as conn:
+            cursor = await conn.cursor()
+            await cursor.executemany(
+                'INSERT OR REPLACE INTO cooldowns (user_id, kind, used_at) VALUES (?, ?, ?)',
+                [(str(user_id), kind, used_at) for user_id, kind, used_at in cooldowns]
+            )
+            await conn.commit()
+
+    async def get_lottery_info(self):
         """Get current lottery status"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT * FROM lottery LIMIT 1')
-            result = cursor.fetchone()
-            
-            if not result:
-                cursor.execute(
-                    'INSERT INTO lottery (jackpot, current_tickets) VALUES (?, ?)',
-                    (100000, '{}')
-                )
-                conn.commit()
-                return {'jackpot': 100000, 'tickets': {}, 'last_draw': None}
+        async with self.get_connection() as conn:
+            cursor = await conn.cursor()
+            await cursor.execute('SELECT jackpot, last_draw, draw_id, next_draw FROM lottery LIMIT 1')
+            result = await cursor.fetchone()
             
             return {
                 'jackpot': result[0],
                 'last_draw': result[1],
-                'tickets': json.loads(result[2])
+                'draw_id': result[2],
+                'next_draw': result[3]
             }
 
-    def update_lottery(self, jackpot=None, tickets=None):
-        """Update lottery information"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            if jackpot is not None:
-                cursor.execute('UPDATE lottery SET jackpot = ?', (jackpot,))
-            if tickets is not None:
-                cursor.execute('UPDATE lottery SET current_tickets = ?', (json.dumps(tickets),))
-            conn.commit()
-
-    def reset_lottery(self):
-        """Reset lottery after draw"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
+    async def get_next_draw(self, interval):
+        """Get the persisted deadline of the next draw, scheduling one
+        interval after the last draw (or from now) if none is set"""
+        async with self.get_connection() as conn:
+            cursor = await conn.cursor()
+            await cursor.execute('SELECT next_draw, last_draw FROM lottery')
+            next_draw, last_draw = await cursor.fetchone()
+            if next_draw:
+                return datetime.fromisoformat(next_draw)
+            
+            start = datetime.fromisoformat(last_draw) if last_draw else datetime.now()
+            next_draw = start + interval
+            await cursor.execute('UPDATE lottery SET next_draw = ?', (next_draw.isoformat(),))
+            await conn.commit()
+            return next_draw
+
+    async def add_to_jackpot(self, amount):
+        """Add to the jackpot without reading it first"""
+        async with self.get_connection() as conn:
+            cursor = await conn.cursor()
+            await cursor.execute('UPDATE lottery SET jackpot = jackpot + ?', (amount,))
+            await conn.commit()
+
+    async def complete_draw(self, draw_id, winning_number, paid_jackpot, next_draw):
+        """Pay everyone holding winning_number in draw_id and start the next draw, all in one transaction.
+
+        Winners are read inside the transaction, so every ticket sold for the
+        draw is considered. Only the first call for a given draw_id does
+        anything, so a draw that already completed before a restart is never
+        paid twice; later calls return None. Otherwise returns (winners,
+        prize_per_winner). Contributions added after paid_jackpot was read carry over.
+        """
+        async with self.get_connection() as conn:
+            cursor = await conn.cursor()
+            await cursor.execute('''
                 UPDATE lottery 
-                SET jackpot = 100000,
+                SET jackpot = jackpot - ? + 100000,
                     last_draw = ?,
-                    current_tickets = '{}'
-            ''', (datetime.now().isoformat(),))
-            conn.commit()
+                    next_draw = ?,
+                    draw_id = draw_id + 1
+                WHERE draw_id = ?
+            ''', (paid_jackpot, datetime.now().isoformat(), next_draw.isoformat(), draw_id))
+            if cursor.rowcount == 0:
+                await conn.rollback()
+                return None
+            
+            # Only tickets with the winning number are read
+            await cursor.execute(
+                'SELECT user_id FROM lottery_tickets WHERE draw_id = ? AND number = ?',
+                (draw_id, winning_number)
+            )
+            winners = [row[0] for row in await cursor.fetchall()]
+            prize_per_winner = paid_jackpot // len(winners) if winners else 0
+            
+            await cursor.executemany(
+                'UPDATE users SET cash_balance = cash_balance + ? WHERE user_id = ?',
+                [(prize_per_winner, str(winner_id)) for winner_id in winners]
+            )
+            await cursor.execute('DELETE FROM lottery_tickets WHERE draw_id = ?', (draw_id,))
+            await conn.commit()
+            return winners, prize_per_winner
 
-    def get_robbery_stats(self, user_id):
+    async def get_user_tickets(self, user_id):
+        """Get a user's tickets for the current draw as {number: count}"""
+        async with self.get_connection() as conn:
+            cursor = await conn.cursor()
+            await cursor.execute('''
+                SELECT number, count FROM lottery_tickets
+                WHERE draw_id = (SELECT draw_id FROM lottery) AND user_id = ?
+                ORDER BY number
+            ''', (str(user_id),))
+            return dict(await cursor.fetchall())
+
+    async def count_user_tickets(self, user_id):
+        """Get how many tickets a user holds in the current draw"""
+        async with self.get_connection() as conn:
+            cursor = await conn.cursor()
+            await cursor.execute('''
+                SELECT COALESCE(SUM(count), 0) FROM lottery_tickets
+                WHERE draw_id = (SELECT draw_id FROM lottery) AND user_id = ?
+            ''', (str(user_id),))
+            return (await cursor.fetchone())[0]
+
+    async def get_robbery_stats(self, user_id):
         """Get user's robbery statistics"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT * FROM robbery_stats WHERE user_id = ?', (str(user_id),))
-            stats = cursor.fetchone()
+        async with self.get_connection() as conn:
+            cursor = await conn.cursor()
+            await cursor.execute('SELECT * FROM robbery_stats WHERE user_id = ?', (str(user_id),))
+            stats = await cursor.fetchone()
             
             if not stats:
                 return {'total_stolen': 0, 'successful_robberies': 0, 'failed_robberies': 0}
@@ -165,56 +366,227 @@ class Database:
                 'failed_robberies': stats[3]
             }
 
-    def update_robbery_stats(self, user_id, amount_stolen=0, success=True):
-        """Update user's robbery statistics"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO robbery_stats (user_id, total_stolen, successful_robberies, failed_robberies)
-                VALUES (?, ?, ?, ?)
-                ON CONFLICT(user_id) DO UPDATE SET
-                    total_stolen = total_stolen + ?,
-                    successful_robberies = successful_robberies + ?,
-                    failed_robberies = failed_robberies + ?
-            ''', (
-                str(user_id),
-                amount_stolen if success else 0,
-                1 if success else 0,
-                0 if success else 1,
-                amount_stolen if success else 0,
-                1 if success else 0,
-                0 if success else 1
-            ))
-            conn.commit()
-
-    def get_leaderboard(self):
+    async def update_robbery_stats(self, user_id, amount_stolen=0, success=True, cash_change=0):
+        """Update user's robbery statistics, applying any cash_change in the same transaction.
+        Returns the updated user record"""
+        async with self.get_connection() as conn:
+            cursor = await conn.cursor()
+            if cash_change != 0:
+                await cursor.execute(
+                    f'UPDATE users SET cash_balance = cash_balance + ? WHERE user_id = ? RETURNING {USER_COLUMNS}',
+                    (cash_change, str(user_id))
+                )
+            else:
+                await cursor.execute(f'SELECT {USER_COLUMNS} FROM users WHERE user_id = ?', (str(user_id),))
+            user = await cursor.fetchone()
+            await self._add_robbery_stats(cursor, user_id, amount_stolen, success)
+            await conn.commit()
+            return self._user_row(user) if user else None
+
+    async def _add_robbery_stats(self, cursor, user_id, amount_stolen, success):
+        await cursor.execute('''
+            INSERT INTO robbery_stats (user_id, total_stolen, successful_robberies, failed_robberies)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(user_id) DO UPDATE SET
+                total_stolen = total_stolen + ?,
+                successful_robberies = successful_robberies + ?,
+                failed_robberies = failed_robberies + ?
+        ''', (
+            str(user_id),
+            amount_stolen if success else 0,
+            1 if success else 0,
+            0 if success else 1,
+            amount_stolen if success else 0,
+            1 if success else 0,
+            0 if success else 1
+        ))
+
+    async def transfer(self, from_id, to_id, amount, robbery=False):
+        """Move cash from one user to another in a single transaction.
+
+        The debit only happens if from_id still has at least amount in cash
+        and to_id exists; otherwise nothing is changed and None is returned. With robbery=True
+        the move is also recorded as a successful robbery by to_id.
+        Returns the updated (from, to) user records.
+        """
+        async with self.get_connection() as conn:
+            cursor = await conn.cursor()
+            await cursor.execute(
+                f'''UPDATE users SET cash_balance = cash_balance - ?
+                   WHERE user_id = ? AND cash_balance >= ? RETURNING {USER_COLUMNS}''',
+                (amount, str(from_id), amount)
+            )
+            from_user = await cursor.fetchone()
+            if not from_user:
+                await conn.rollback()
+                return None
+            
+            await cursor.execute(
+                f'UPDATE users SET cash_balance = cash_balance + ? WHERE user_id = ? RETURNING {USER_COLUMNS}',
+                (amount, str(to_id))
+            )
+            to_user = await cursor.fetchone()
+            if not to_user:
+                await conn.rollback()
+                return None
+            if robbery:
+                await self._add_robbery_stats(cursor, to_id, amount, True)
+            await conn.commit()
+            return self._user_row(from_user), self._user_row(to_user)
+
+    async def get_all_robbery_stats(self):
+        """Get robbery statistics for every user"""
+        async with self.get_connection() as conn:
+            cursor = await conn.cursor()
+            await cursor.execute('SELECT * FROM robbery_stats')
+            rows = await cursor.fetchall()
+            
+            return [
+                (row[0], {
+                    'total_stolen': row[1],
+                    'successful_robberies': row[2],
+                    'failed_robberies': row[3]
+                })
+                for row in rows
+            ]
+
+    async def get_leaderboard(self):
         """Get user rankings by total wealth"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT user_id, (cash_balance + bank_balance) as total_wealth
+        async with self.get_connection() as conn:
+            cursor = await conn.cursor()
+            await cursor.execute('''
+                SELECT user_id, total_wealth
                 FROM users
-                ORDER BY total_wealth DESC
+                ORDER BY total_wealth DESC, user_id
             ''')
-            return cursor.fetchall()
-
-    def add_tickets(self, user_id, new_tickets):
-        """Add new tickets to user's lottery tickets"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT current_tickets FROM lottery')
-            result = cursor.fetchone()
-            
-            if not result:
-                cursor.execute(
-                    'INSERT INTO lottery (current_tickets) VALUES (?)',
-                    ('{}',)
-                )
-                conn.commit()
-                tickets = {}
-            else:
-                tickets = json.loads(result[0])
+            return await cursor.fetchall()
+
+    async def count_users(self):
+        """Get the number of users on the leaderboard"""
+        async with self.get_connection() as conn:
+            cursor = await conn.cursor()
+            await cursor.execute('SELECT COUNT(*) FROM users')
+            return (await cursor.fetchone())[0]
+
+    async def get_leaderboard_page(self, limit, after=None, before=None):
+        """Get one page of rankings by total wealth.
+
+        Pages are found by seeking past a (user_id, total_wealth) row from a
+        neighbouring page: after= the last row of the previous page, or
+        before= the first row of the next one. Neither means the first page.
+        """
+        async with self.get_connection() as conn:
+            cursor = await conn.cursor()
+            if after is not None:
+                user_id, wealth = after
+                await cursor.execute('''
+                    SELECT user_id, total_wealth
+                    FROM users
+                    WHERE total_wealth < ? OR (total_wealth = ? AND user_id > ?)
+                    ORDER BY total_wealth DESC, user_id
+                    LIMIT ?
+                ''', (wealth, wealth, user_id, limit))
+                return await cursor.fetchall()
             
-            tickets[user_id] = tickets.get(user_id, []) + new_tickets
-            cursor.execute('UPDATE lottery SET current_tickets = ?', (json.dumps(tickets),))
-            conn.commit() 
\ No newline at end of file
+            if before is not None:
+                user_id, wealth = before
+                await cursor.execute('''
+                    SELECT user_id, total_wealth
+                    FROM users
+                    WHERE total_wealth > ? OR (total_wealth = ? AND user_id < ?)
+                    ORDER BY total_wealth, user_id DESC
+                    LIMIT ?
+                ''', (wealth, wealth, user_id, limit))
+                return (await cursor.fetchall())[::-1]
+            
+            await cursor.execute('''
+                SELECT user_id, total_wealth
+                FROM users
+                ORDER BY total_wealth DESC, user_id
+                LIMIT ?
+            ''', (limit,))
+            return await cursor.fetchall()
+
+    async def add_tickets(self, user_id, new_tickets):
+        """Add new tickets, given as {number: count}, to user's lottery tickets"""
+        async with self.get_connection() as conn:
+            cursor = await conn.cursor()
+            await cursor.execute('SELECT draw_id FROM lottery')
+            draw_id = (await cursor.fetchone())[0]
+            await self._add_ticket_counts(cursor, draw_id, user_id, new_tickets)
+            await conn.commit()
+
+    async def _add_ticket_counts(self, cursor, draw_id, user_id, counts):
+        await cursor.executemany('''
+            INSERT INTO lottery_tickets (draw_id, user_id, number, count) VALUES (?, ?, ?, ?)
+            ON CONFLICT(draw_id, user_id, number) DO UPDATE SET count = count + excluded.count
+        ''', [(draw_id, str(user_id), number, count) for number, count in counts.items()])
+ 
+
+    async def enqueue_dms(self, messages):
+        """Queue (user_id, payload) direct messages; returns their outbox ids"""
+        async with self.get_connection() as conn:
+            cursor = await conn.cursor()
+            ids = []
+            for user_id, payload in messages:
+                await cursor.execute(
+                    'INSERT INTO dm_outbox (user_id, payload) VALUES (?, ?) RETURNING id',
+                    (str(user_id), json.dumps(payload))
+                )
+                ids.append((await cursor.fetchone())[0])
+            await conn.commit()
+            return ids
+
+    async def get_pending_dms(self):
+        """All queued direct messages as (id, user_id, payload, attempts, next_attempt)"""
+        async with self.get_connection() as conn:
+            cursor = await conn.cursor()
+            await cursor.execute('SELECT id, user_id, payload, attempts, next_attempt FROM dm_outbox ORDER BY id')
+            return [
+                (dm_id, user_id, json.loads(payload), attempts, next_attempt)
+                for dm_id, user_id, payload, attempts, next_attempt in await cursor.fetchall()
+            ]
+
+    async def reschedule_dm(self, dm_id, attempts, next_attempt):
+        """Record a failed delivery and when to try again"""
+        async with self.get_connection() as conn:
+            cursor = await conn.cursor()
+            await cursor.execute(
+                'UPDATE dm_outbox SET attempts = ?, next_attempt = ? WHERE id = ?',
+                (attempts, next_attempt.isoformat(), dm_id)
+            )
+            await conn.commit()
+
+    async def delete_dm(self, dm_id):
+        """Remove a delivered or abandoned direct message"""
+        async with self.get_connection() as conn:
+            cursor = await conn.cursor()
+            await cursor.execute('DELETE FROM dm_outbox WHERE id = ?', (dm_id,))
+            await conn.commit()
+
+    async def get_game_sessions(self):
+        """All stored game sessions as (message_id, channel_id, game, state, expires_at)"""
+        async with self.get_connection() as conn:
+            cursor = await conn.cursor()
+            await cursor.execute('SELECT message_id, channel_id, game, state, expires_at FROM game_sessions')
+            return [
+                (message_id, channel_id, game, json.loads(state), expires_at)
+                for message_id, channel_id, game, state, expires_at in await cursor.fetchall()
+            ]
+
+    async def save_game_session(self, message_id, channel_id, game, state, expires_at):
+        """Insert or replace a game session"""
+        async with self.get_connection() as conn:
+            cursor = await conn.cursor()
+            await cursor.execute(
+                'INSERT OR REPLACE INTO game_sessions (message_id, channel_id, game, state, expires_at) VALUES (?, ?, ?, ?, ?)',
+                (message_id, channel_id, game, json.dumps(state), expires_at)
+            )
+            await conn.commit()
+
+    async def delete_game_session(self, message_id):
+        """Remove a finished or expired game session"""
+        async with self.get_connection() as conn:
+            cursor = await conn.cursor()
+            await cursor.execute('DELETE FROM game_sessions WHERE message_id = ?', (message_id,))
+            await conn.commit()
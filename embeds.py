@@ -0,0 +1,200 @@
+import discord
+
+class EmbedRegistry:
+    """Embeds for fixed screens (help, usage, common errors), built once at startup"""
+
+    def __init__(self):
+        self.specs = {}
+        self.templates = {}
+
+    def register(self, key, title, description=None, color=None, fields=(), footer=None):
+        """Add a template; fields are (name, value, inline) tuples"""
+        spec = (title, description, color or discord.Color.blue(), tuple(fields), footer)
+        self.specs[key] = spec
+        self.templates[key] = self._build(*spec)
+
+    def get(self, key):
+        """The prebuilt embed for key; send it as is, never modify it"""
+        return self.templates[key]
+
+    def fill(self, key, **params):
+        """A new embed for key with its placeholders filled from params"""
+        title, description, color, fields, footer = self.specs[key]
+        if fields:
+            fields = [(name, value.format_map(params), inline) for name, value, inline in fields]
+        return self._build(
+            title,
+            description.format_map(params) if description else description,
+            color,
+            fields,
+            footer
+        )
+
+    def _build(self, title, description, color, fields, footer):
+        embed = discord.Embed(title=title, description=description, color=color)
+        for name, value, inline in fields:
+            embed.add_field(name=name, value=value, inline=inline)
+        if footer:
+            embed.set_footer(text=footer)
+        return embed
+
+registry = EmbedRegistry()
+
+# Help and usage screens
+registry.register(
+    'menu',
+    title="🎰 Casino Bot Commands",
+    description="Here are all available commands:",
+    fields=[
+        ("🏦 Banking", (
+            "**!deposit/!dep <amount>** - Deposit cash to your bank (safe from robbery)\n"
+            "**!withdraw/!with <amount>** - Withdraw cash from your bank\n"
+            "**!pay <@user> <amount>** - Pay another player from your cash\n"
+            "**!money/!bal** - Check your balances and rank\n"
+            "**!rob <@user>** - Rob someone's cash"
+        ), False),
+        ("🎮 Games", (
+            "**!blackjack/!bj <bet>** - Play blackjack\n"
+            "**!blackjack auto <bet> <hands>** - Autoplay many hands of basic strategy\n"
+            "**!roulette/!rl <bet> <amount> ...** - Play roulette, several bets per spin\n"
+            "**!dice <bet> <number>** - Bet on a dice roll (1-6)\n"
+            "**!rps @player <bet>** - Challenge someone to Rock Paper Scissors\n"
+            "**!lottery/!lot** - View lottery status\n"
+            "**!lottery buy <amount>** - Buy lottery tickets\n"
+            "**!lottery numbers** - View your tickets\n"
+            "• Use 'all' to bet all your cash\n"
+            "• Roulette: numbers, splits, dozens, columns, colors, even/odd, halves\n"
+            "• Dice: Win 5x your bet if you guess right\n"
+            "• Lottery draws happen daily with growing jackpot"
+        ), False),
+        ("💰 Economy", (
+            "**!work** - Work to earn money (1-hour cooldown)\n"
+            "**!nextwork** - Check when you can work again\n"
+            "**!crime** - Commit a crime (high risk/reward, 1h cooldown)\n"
+            "**!97ab** - Special work (1h cooldown)\n"
+            "**!leaderboard/!lb** - View richest players"
+        ), False),
+        ("💡 Tips", (
+            "• Starting balance: $10,000\n"
+            "• Work earns $1,000-$5,000\n"
+            "• Crime earns $30,000-$50,000\n"
+            "• Failed robbery: 30% fine of total balance\n"
+            "• Successful robbery: 60-100% of target's cash"
+        ), False),
+    ],
+    footer="Use !botm9wd, !commands, or !menu to see this menu again"
+)
+registry.register(
+    'blackjack_help',
+    title="ℹ️ Blackjack Help",
+    description="To play blackjack, you need to specify a bet amount.",
+    fields=[
+        ("Usage", "!blackjack <bet_amount>\nor\n!bj <bet_amount>\nor\n!blackjack all", False),
+        ("Autoplay", "!blackjack auto <bet_amount> <hands>\nPlays up to 1,000 hands of basic strategy in one go", False),
+        ("Example", "!blackjack 100\n!blackjack all\n!blackjack auto 100 50", False),
+    ]
+)
+registry.register(
+    'roulette_help',
+    title="ℹ️ Roulette Help",
+    description="Place your bets on the roulette table!",
+    fields=[
+        ("Usage", "!roulette <bet> <amount> [<bet> <amount> ...]\n!roulette <bet> all", False),
+        ("Bets", (
+            "Winnings are on top of your returned stake\n"
+            "Number `0`-`36` pays 35 to 1\n"
+            "Split `8/11` pays 17 to 1\n"
+            "Dozen `1-12` `13-24` `25-36`, column `col1` `col2` `col3` pay 2 to 1\n"
+            "`red` `black` `even` `odd` `1-18` `19-36` pay 2 to 1"
+        ), False),
+        ("Examples", "!roulette red 100\n!roulette 7 50 8/11 50 col2 100\n!roulette black all", False),
+    ]
+)
+registry.register(
+    'dice_help',
+    title="🎲 Dice Help",
+    description="Bet on a dice roll (1-6)!",
+    fields=[
+        ("Usage", "!dice <bet_amount> <number>", False),
+        ("Example", "!dice 1000 6\n!dice all 3", False),
+        ("Payout", "Win: 5x your bet\nLose: Lose your bet", False),
+    ]
+)
+registry.register(
+    'rob_help',
+    title="ℹ️ Rob Help",
+    description="Rob another player's cash!",
+    fields=[
+        ("Usage", "!rob @username", False),
+        ("Example", "!rob @JohnDoe", False),
+        ("Stats", "Use !chfara to view robbery statistics!", False),
+    ]
+)
+registry.register(
+    'pay_help',
+    title="ℹ️ Pay Help",
+    description="Pay another player from your cash balance!",
+    fields=[
+        ("Usage", "!pay @username <amount>\n!pay @username all", False),
+        ("Example", "!pay @JohnDoe 1000\n!pay @JohnDoe all", False),
+    ]
+)
+registry.register(
+    'rps_help',
+    title="🎮 Rock Paper Scissors Help",
+    description="Challenge someone to a game of Rock Paper Scissors!",
+    fields=[
+        ("Usage", "!rps @player <bet_amount>\n!rps @player all", False),
+        ("Example", "!rps @JohnDoe 1000\n!rps @JohnDoe all", False),
+    ]
+)
+registry.register(
+    'deposit_help',
+    title="ℹ️ Deposit Help",
+    description="Deposit your cash into the bank for safekeeping.",
+    fields=[
+        ("Usage", "!deposit <amount>\n!deposit all", False),
+        ("Examples", "!deposit 1000\n!deposit all", False),
+    ]
+)
+registry.register(
+    'withdraw_help',
+    title="ℹ️ Withdraw Help",
+    description="Withdraw money from your bank account.",
+    fields=[
+        ("Usage", "!withdraw <amount>\n!withdraw all", False),
+        ("Examples", "!withdraw 1000\n!withdraw all", False),
+    ]
+)
+
+# Common errors
+registry.register(
+    'bet_not_a_number',
+    title="❌ Invalid Bet",
+    description="Bet amount must be a number or 'all'!",
+    color=discord.Color.red()
+)
+registry.register(
+    'bet_not_positive',
+    title="❌ Invalid Bet",
+    description="Bet amount must be greater than 0!",
+    color=discord.Color.red()
+)
+registry.register(
+    'amount_not_a_number',
+    title="❌ Invalid Amount",
+    description="Amount must be a number or 'all'!",
+    color=discord.Color.red()
+)
+registry.register(
+    'amount_not_positive',
+    title="❌ Invalid Amount",
+    description="Amount must be greater than 0!",
+    color=discord.Color.red()
+)
+registry.register(
+    'insufficient_cash_for_bet',
+    title="❌ Insufficient Cash",
+    description="You need ${bet:,} in cash, but you only have ${cash:,}!\nWithdraw from your bank first!",
+    color=discord.Color.red()
+)
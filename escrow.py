@@ -0,0 +1,41 @@
+class Escrow:
+    """Stakes of games still in play, held in memory until settle() applies the results in one group commit"""
+
+    def __init__(self, accounts):
+        self.accounts = accounts
+        self.held = {}
+
+    def available(self, account):
+        """Cash in account that isn't tied up in a running game"""
+        return account['cash_balance'] - self.held.get(str(account['user_id']), 0)
+
+    def hold(self, user_id, amount):
+        """Reserve amount of user_id's cash. Check available() first, with no await in between"""
+        user_id = str(user_id)
+        self.held[user_id] = self.held.get(user_id, 0) + amount
+
+    def release(self, user_id, amount):
+        """Give back a stake without changing the balance"""
+        user_id = str(user_id)
+        left = self.held.get(user_id, 0) - amount
+        if left > 0:
+            self.held[user_id] = left
+        else:
+            self.held.pop(user_id, None)
+
+    async def settle(self, results):
+        """Apply (user_id, stake, cash_change) results and release their stakes.
+        Returns the updated accounts in the same order"""
+        try:
+            # Fetch first so the changes are queued back to back for the same flush
+            for user_id, _, _ in results:
+                await self.accounts.get_user(user_id)
+            # Stakes stay held until the result is in the balance
+            return [
+                await self.accounts.update_balance(user_id, cash_change=cash_change)
+                if cash_change else await self.accounts.get_user(user_id)
+                for user_id, _, cash_change in results
+            ]
+        finally:
+            for user_id, stake, _ in results:
+                self.release(user_id, stake)
@@ -1,154 +1,243 @@
 import discord
 from discord.ext import commands
 import random
+from array import array
 from discord.ui import Button, View
+from games.rules import DEALER_STANDS_ON, BLACKJACK_PAYOUT
 
-class Card:
-    def __init__(self, suit, value):
-        self.suit = suit
-        self.value = value
+# Cards are ints 0-51: rank = card % 13, suit = card // 13
+SUIT_EMOJI = ('♥️', '♦️', '♣️', '♠️')
+RANKS = ('2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A')
+RANK_VALUES = (2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10, 11)
+ACE = 12
 
-    def __str__(self):
-        return f"{self.value} of {self.suit}"
+# Per-card lookup tables, so dealing and rendering never build anything
+CARD_VALUES = tuple(RANK_VALUES[card % 13] for card in range(52))
+CARD_EMOJI = tuple(f"`{RANKS[card % 13]}{SUIT_EMOJI[card // 13]}`" for card in range(52))
+
+# Decks in the shared shoe, and how far in the cut card sits
+SHOE_DECKS = 6
+SHOE_PENETRATION = 0.75
+
+class Shoe:
+    """N shuffled decks dealt from one array, reshuffled once the cut card is reached"""
+
+    def __init__(self, decks=SHOE_DECKS, penetration=SHOE_PENETRATION):
+        self.cards = array('B', range(52)) * decks
+        self.cut = int(len(self.cards) * penetration)
+        self.shuffle()
+
+    def shuffle(self):
+        random.shuffle(self.cards)
+        self.position = 0
+
+    def needs_shuffle(self):
+        return self.position >= self.cut
+
+    def draw(self):
+        # The cut card is checked between rounds; only an empty shoe reshuffles mid-round
+        if self.position >= len(self.cards):
+            self.shuffle()
+        card = self.cards[self.position]
+        self.position += 1
+        return card
+
+class Hand:
+    """Cards in a hand with the best total kept up to date as cards are added"""
+    __slots__ = ('cards', 'value', 'soft_aces')
+
+    def __init__(self, cards=()):
+        self.cards = []
+        # Best total, and how many aces in it are still counted as 11
+        self.value = 0
+        self.soft_aces = 0
+        for card in cards:
+            self.add(card)
+
+    def add(self, card):
+        self.cards.append(card)
+        self.value += CARD_VALUES[card]
+        if card % 13 == ACE:
+            self.soft_aces += 1
+        while self.value > 21 and self.soft_aces:
+            self.value -= 10
+            self.soft_aces -= 1
 
     @property
-    def emoji(self):
-        # Card emojis mapping
-        suits_emoji = {
-            'Hearts': '♥️',
-            'Diamonds': '♦️',
-            'Clubs': '♣️',
-            'Spades': '♠️'
-        }
-        
-        # Special formatting for face cards
-        value_display = {
-            'A': 'A',
-            'K': 'K',
-            'Q': 'Q',
-            'J': 'J'
-        }.get(self.value, self.value)
-        
-        return f"`{value_display}{suits_emoji[self.suit]}`"
+    def soft(self):
+        return self.soft_aces > 0
+
+    @property
+    def bust(self):
+        return self.value > 21
+
+    @property
+    def blackjack(self):
+        return self.value == 21 and len(self.cards) == 2
+
+    def __len__(self):
+        return len(self.cards)
+
+    def __iter__(self):
+        return iter(self.cards)
+
+# Seconds a blackjack game waits for the next click
+BLACKJACK_TIMEOUT = 30
 
 class BlackjackView(View):
-    def __init__(self, game, player_hand, dealer_hand, bet, user_id, db):
-        super().__init__(timeout=30)
+    """Hit/Stand buttons shared by every blackjack game"""
+
+    def __init__(self, game, sessions, db, escrow, jackpot=None):
+        super().__init__(timeout=None)
         self.game = game
-        self.player_hand = player_hand
-        self.dealer_hand = dealer_hand
-        self.bet = bet
-        self.user_id = user_id
-        self.ended = False
+        self.sessions = sessions
         self.db = db
+        # Holds each game's bet from the deal until it is settled
+        self.escrow = escrow
+        self.jackpot = jackpot
 
-    @discord.ui.button(label="Hit 👊", style=discord.ButtonStyle.green)
-    async def hit_button(self, interaction: discord.Interaction, button: Button):
-        if interaction.user.id != int(self.user_id):
+    def detached(self, disabled=False):
+        """A stopped copy to attach to messages; clicks still reach the registered view by custom_id"""
+        view = BlackjackView(self.game, self.sessions, self.db, self.escrow, self.jackpot)
+        for child in view.children:
+            child.disabled = disabled
+        view.stop()
+        return view
+
+    async def start(self, channel, user_id, bet, balance):
+        """Hold bet, deal a new game into channel and start its session.
+        The caller checks that bet is available"""
+        self.escrow.hold(user_id, bet)
+        try:
+            player_hand, dealer_hand = self.game.deal()
+            embed = self.game.create_game_embed(player_hand, dealer_hand, bet=bet, balance=balance)
+            message = await channel.send(embed=embed, view=self.detached())
+            state = {'user_id': user_id, 'bet': bet, 'player': player_hand.cards, 'dealer': dealer_hand.cards}
+            await self.sessions.create(message.id, message.channel.id, 'blackjack', state, BLACKJACK_TIMEOUT)
+        except Exception:
+            self.escrow.release(user_id, bet)
+            raise
+
+    def restore(self, session):
+        """Hold the bet again for a game that was running when the bot stopped"""
+        self.escrow.hold(session['state']['user_id'], session['state']['bet'])
+
+    async def _load(self, interaction):
+        session = self.sessions.get(interaction.message.id, 'blackjack')
+        if session is None:
+            await interaction.response.send_message("This game has ended!", ephemeral=True)
+            return None
+        if interaction.user.id != int(session['state']['user_id']):
             await interaction.response.send_message("This is not your game!", ephemeral=True)
+            return None
+        return session['state']
+
+    @discord.ui.button(label="Hit 👊", style=discord.ButtonStyle.green, custom_id='blackjack:hit')
+    async def hit_button(self, interaction: discord.Interaction, button: Button):
+        state = await self._load(interaction)
+        if state is None:
             return
 
-        self.player_hand.append(self.game.deck.pop())
-        player_value = self.game.calculate_hand(self.player_hand)
+        player_hand = Hand(state['player'])
+        dealer_hand = Hand(state['dealer'])
+        player_hand.add(self.game.shoe.draw())
+        state['player'] = player_hand.cards
+        bet = state['bet']
 
-        if player_value > 21:
-            self.ended = True
-            for child in self.children:
-                child.disabled = True
-            
-            # Update balance through database
-            self.db.update_balance(self.user_id, cash_change=-self.bet)
+        if player_hand.bust:
+            await self.sessions.delete(interaction.message.id)
             
-            # Get updated user data
-            updated_data = self.db.get_user(self.user_id)
+            # Settle the held bet
+            updated_data, = await self.escrow.settle([(state['user_id'], bet, -bet)])
+            self._feed_jackpot(bet)
             
             embed = self.game.create_game_embed(
-                self.player_hand, 
-                self.dealer_hand,
+                player_hand, 
+                dealer_hand,
                 hide_dealer=False,
                 game_over=True,
-                bet=self.bet,
+                bet=bet,
                 balance=updated_data['cash_balance']
             )
-            await interaction.response.edit_message(embed=embed, view=self)
+            await interaction.response.edit_message(embed=embed, view=self.detached(disabled=True))
             return
 
+        await self.sessions.update(interaction.message.id, BLACKJACK_TIMEOUT)
+
         # Get current balance for display
-        current_data = self.db.get_user(self.user_id)
+        current_data = await self.db.get_user(state['user_id'])
         embed = self.game.create_game_embed(
-            self.player_hand, 
-            self.dealer_hand, 
-            bet=self.bet,
+            player_hand, 
+            dealer_hand, 
+            bet=bet,
             balance=current_data['cash_balance']
         )
-        await interaction.response.edit_message(embed=embed, view=self)
+        await interaction.response.edit_message(embed=embed, view=self.detached())
 
-    @discord.ui.button(label="Stand ✋", style=discord.ButtonStyle.red)
+    @discord.ui.button(label="Stand ✋", style=discord.ButtonStyle.red, custom_id='blackjack:stand')
     async def stand_button(self, interaction: discord.Interaction, button: Button):
-        if interaction.user.id != int(self.user_id):
-            await interaction.response.send_message("This is not your game!", ephemeral=True)
+        state = await self._load(interaction)
+        if state is None:
             return
+        await self.sessions.delete(interaction.message.id)
 
-        dealer_value = self.game.calculate_hand(self.dealer_hand)
-        while dealer_value < 17:
-            self.dealer_hand.append(self.game.deck.pop())
-            dealer_value = self.game.calculate_hand(self.dealer_hand)
+        player_hand = Hand(state['player'])
+        dealer_hand = Hand(state['dealer'])
+        bet = state['bet']
+        while dealer_hand.value < DEALER_STANDS_ON:
+            dealer_hand.add(self.game.shoe.draw())
 
-        player_value = self.game.calculate_hand(self.player_hand)
+        dealer_value = dealer_hand.value
+        player_value = player_hand.value
         
-        # Update balance through database
+        # Settle the held bet; a push just releases it
         if dealer_value > 21 or player_value > dealer_value:
-            self.db.update_balance(self.user_id, cash_change=self.bet)
+            net = bet * BLACKJACK_PAYOUT
         elif player_value < dealer_value:
-            self.db.update_balance(self.user_id, cash_change=-self.bet)
-
-        self.ended = True
-        for child in self.children:
-            child.disabled = True
-
-        # Get updated user data
-        updated_data = self.db.get_user(self.user_id)
+            net = -bet
+            self._feed_jackpot(bet)
+        else:
+            net = 0
+        updated_data, = await self.escrow.settle([(state['user_id'], bet, net)])
 
         embed = self.game.create_game_embed(
-            self.player_hand,
-            self.dealer_hand,
+            player_hand,
+            dealer_hand,
             hide_dealer=False,
             game_over=True,
-            bet=self.bet,
+            bet=bet,
             balance=updated_data['cash_balance']
         )
-        await interaction.response.edit_message(embed=embed, view=self)
+        await interaction.response.edit_message(embed=embed, view=self.detached(disabled=True))
+
+    async def expire(self, message_id, session):
+        """Session store callback for games left idle past BLACKJACK_TIMEOUT"""
+        # Nobody played the hand out, so the bet goes back
+        self.escrow.release(session['state']['user_id'], session['state']['bet'])
+        timeout_embed = discord.Embed(
+            title="⏰ Game Timed Out",
+            description=f"No action taken for {BLACKJACK_TIMEOUT} seconds",
+            color=discord.Color.light_grey()
+        )
+        channel = self.game.bot.get_partial_messageable(session['channel_id'])
+        await channel.get_partial_message(message_id).edit(embed=timeout_embed, view=self.detached(disabled=True))
+
+    def _feed_jackpot(self, bet):
+        if self.jackpot is not None:
+            self.jackpot.add_game_bet(bet, 'blackjack')
 
 class Blackjack:
-    def __init__(self, bot):
+    def __init__(self, bot, shoe=None):
         self.bot = bot
-        self.suits = ['Hearts', 'Diamonds', 'Clubs', 'Spades']
-        self.values = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
-        self.deck = self.create_deck()
-        random.shuffle(self.deck)
-        
-    def create_deck(self):
-        return [Card(suit, value) for suit in self.suits for value in self.values]
+        # One shoe is shared by every game dealt from this table
+        self.shoe = shoe or Shoe()
 
-    def calculate_hand(self, hand):
-        value = 0
-        aces = 0
-        
-        for card in hand:
-            if card.value in ['J', 'Q', 'K']:
-                value += 10
-            elif card.value == 'A':
-                aces += 1
-            else:
-                value += int(card.value)
-                
-        for _ in range(aces):
-            if value + 11 <= 21:
-                value += 11
-            else:
-                value += 1
-                
-        return value
+    def deal(self):
+        """Start a round: (player_hand, dealer_hand) with two cards each"""
+        if self.shoe.needs_shuffle():
+            self.shoe.shuffle()
+        draw = self.shoe.draw
+        return Hand((draw(), draw())), Hand((draw(), draw()))
 
     def create_game_embed(self, player_hand, dealer_hand, hide_dealer=True, game_over=False, bet=0, balance=None):
         embed = discord.Embed(
@@ -157,8 +246,8 @@ class Blackjack:
         )
 
         # Dealer's section with improved formatting
-        dealer_cards = [card.emoji for card in dealer_hand]
-        dealer_value = self.calculate_hand(dealer_hand)
+        dealer_cards = [CARD_EMOJI[card] for card in dealer_hand]
+        dealer_value = dealer_hand.value
         
         if hide_dealer:
             dealer_cards[1] = "`🎴`"
@@ -172,8 +261,8 @@ class Blackjack:
         embed.add_field(name="", value="▰▰▰▰▰▰▰▰▰▰▰▰▰▰▰▰", inline=False)
 
         # Player's section with improved formatting
-        player_value = self.calculate_hand(player_hand)
-        player_cards = [card.emoji for card in player_hand]
+        player_value = player_hand.value
+        player_cards = [CARD_EMOJI[card] for card in player_hand]
         player_display = f"**Your Hand ({player_value})**\n{'  '.join(player_cards)}"
         
         embed.add_field(name="👤 Player", value=player_display, inline=False)
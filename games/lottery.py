@@ -0,0 +1,48 @@
+import random
+from collections import Counter
+
+# Tickets carry a number from 1 to LOTTERY_NUMBERS
+LOTTERY_NUMBERS = 99
+# Above this many tickets, numbers are drawn per slot instead of per ticket
+BULK_PURCHASE = 1000
+
+def _binomial(n, p):
+    if hasattr(random, 'binomialvariate'):
+        return random.binomialvariate(n, p)
+    # Normal approximation for Pythons without binomialvariate; bulk purchases
+    # keep n * p above ~10, where it is accurate enough for a lottery
+    mean = n * p
+    k = round(random.gauss(mean, (mean * (1 - p)) ** 0.5))
+    return min(max(k, 0), n)
+
+def pick_numbers(num_tickets):
+    """Random numbers for num_tickets tickets, as a {number: count} histogram.
+
+    Large purchases are sampled as one multinomial draw over the slots, so
+    the cost depends on LOTTERY_NUMBERS rather than on num_tickets.
+    """
+    if num_tickets <= BULK_PURCHASE:
+        return Counter(random.randint(1, LOTTERY_NUMBERS) for _ in range(num_tickets))
+
+    counts = Counter()
+    remaining = num_tickets
+    for number in range(1, LOTTERY_NUMBERS):
+        k = _binomial(remaining, 1 / (LOTTERY_NUMBERS - number + 1))
+        if k:
+            counts[number] = k
+        remaining -= k
+    if remaining:
+        counts[LOTTERY_NUMBERS] = remaining
+    return counts
+
+def format_ticket_counts(counts, per_field=33):
+    """Embed (name, value) fields summarising a {number: count} histogram"""
+    numbers = sorted(counts)
+    fields = []
+    for i in range(0, len(numbers), per_field):
+        chunk = numbers[i:i + per_field]
+        fields.append((
+            f"Numbers {chunk[0]}-{chunk[-1]}",
+            ", ".join(str(n) if counts[n] == 1 else f"{n} ×{counts[n]:,}" for n in chunk)
+        ))
+    return fields
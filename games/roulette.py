@@ -2,46 +2,100 @@ import discord
 from discord.ext import commands
 import random
 
+RED_NUMBERS = frozenset([1, 3, 5, 7, 9, 12, 14, 16, 18, 19, 21, 23, 25, 27, 30, 32, 34, 36])
+COLORS = tuple('green' if num == 0 else 'red' if num in RED_NUMBERS else 'black' for num in range(37))
+
+# Distinct bets a player can place in one command
+MAX_BETS = 20
+
+def _build_bets():
+    """Every bet on the table as (name, winning numbers, net payout multiplier)"""
+    bets = [(str(num), {num}, 35) for num in range(37)]
+    # Splits between neighbours on the layout, across a row and down a column
+    for num in range(1, 37):
+        if num % 3:
+            bets.append((f"{num}/{num + 1}", {num, num + 1}, 17))
+        if num <= 33:
+            bets.append((f"{num}/{num + 3}", {num, num + 3}, 17))
+    for i in range(3):
+        bets.append((f"{12 * i + 1}-{12 * i + 12}", set(range(12 * i + 1, 12 * i + 13)), 2))
+    for i in range(3):
+        bets.append((f"col{i + 1}", set(range(i + 1, 37, 3)), 2))
+    bets += [
+        ('red', set(RED_NUMBERS), 2),
+        ('black', {num for num in range(1, 37) if num not in RED_NUMBERS}, 2),
+        ('even', set(range(2, 37, 2)), 2),
+        ('odd', set(range(1, 37, 2)), 2),
+        ('1-18', set(range(1, 19)), 2),
+        ('19-36', set(range(19, 37)), 2),
+    ]
+    return bets
+
+BETS = _build_bets()
+BET_INDEX = {name: i for i, (name, _, _) in enumerate(BETS)}
+BET_INDEX.update({f"d{i + 1}": BET_INDEX[f"{12 * i + 1}-{12 * i + 12}"] for i in range(3)})
+BET_INDEX.update({f"c{i + 1}": BET_INDEX[f"col{i + 1}"] for i in range(3)})
+
+# PAYOUTS[result][bet] is the net multiplier of a bet for a spin: its payout if it wins, -1 if not
+PAYOUTS = tuple(
+    tuple(multiplier if result in numbers else -1 for _, numbers, multiplier in BETS)
+    for result in range(37)
+)
+
+def parse_bet(text):
+    """Index into BETS for a bet like '7', 'red', '8/11', '13-24' or 'col2', or None"""
+    text = text.lower()
+    if '/' in text:
+        try:
+            low, high = sorted(int(part) for part in text.split('/'))
+        except ValueError:
+            return None
+        text = f"{low}/{high}"
+    return BET_INDEX.get(text)
+
 class Roulette:
     def __init__(self, bot):
         self.bot = bot
-        self.numbers = list(range(37))  # 0-36
-        self.colors = {
-            0: 'green',
-            **{num: 'red' if num in [1,3,5,7,9,12,14,16,18,19,21,23,25,27,30,32,34,36] else 'black' 
-               for num in range(1, 37)}
-        }
-        
+
     def spin(self):
-        return random.choice(self.numbers)
-    
-    def check_bet(self, bet_type, bet_value, result):
-        if bet_type == 'number':
-            return bet_value == result, 35
-        elif bet_type == 'color':
-            return bet_value == self.colors[result], 2
-        elif bet_type == 'even':
-            return result != 0 and result % 2 == 0, 2
-        elif bet_type == 'odd':
-            return result != 0 and result % 2 == 1, 2
-        elif bet_type == '1-18':
-            return 1 <= result <= 18, 2
-        elif bet_type == '19-36':
-            return 19 <= result <= 36, 2
-        
-    def create_game_embed(self, result, bet_type, bet_value, won, multiplier, amount):
-        color = discord.Color.green() if self.colors[result] == 'green' else \
-                discord.Color.red() if self.colors[result] == 'red' else \
-                discord.Color.dark_grey()
-                
-        embed = discord.Embed(title="Roulette Game", color=color)
-        embed.add_field(name="Result", value=f"Number: {result} ({self.colors[result]})", inline=False)
-        embed.add_field(name="Your Bet", value=f"Type: {bet_type}\nValue: {bet_value}\nAmount: ${amount}", inline=False)
-        
-        if won:
-            winnings = amount * multiplier
-            embed.add_field(name="Outcome", value=f"You won ${winnings}!", inline=False)
+        return random.randrange(37)
+
+    def settle(self, bets, result):
+        """Net balance change and lost stake for {bet index: amount} on one spin"""
+        row = PAYOUTS[result]
+        net = 0
+        lost = 0
+        for bet, amount in bets.items():
+            net += amount * row[bet]
+            if row[bet] < 0:
+                lost += amount
+        return net, lost
+
+    def create_game_embed(self, result, bets, net, balance):
+        if net > 0:
+            embed = discord.Embed(
+                title="🎰 You Won!",
+                description=f"Ball landed on {result} ({COLORS[result]})!\nYou won ${net:,}!",
+                color=discord.Color.green()
+            )
+        elif net < 0:
+            embed = discord.Embed(
+                title="😢 You Lost!",
+                description=f"Ball landed on {result} ({COLORS[result]})!\nYou lost ${-net:,}!",
+                color=discord.Color.red()
+            )
         else:
-            embed.add_field(name="Outcome", value="You lost!", inline=False)
-            
-        return embed 
\ No newline at end of file
+            embed = discord.Embed(
+                title="🤝 Broke Even",
+                description=f"Ball landed on {result} ({COLORS[result]})!",
+                color=discord.Color.greyple()
+            )
+
+        row = PAYOUTS[result]
+        lines = []
+        for bet, amount in bets.items():
+            outcome = f"+${amount * row[bet]:,}" if row[bet] > 0 else "lost"
+            lines.append(f"{BETS[bet][0]}: ${amount:,} → {outcome}")
+        embed.add_field(name="🎲 Your Bets", value="\n".join(lines), inline=False)
+        embed.add_field(name="💰 New Cash Balance", value=f"${balance:,}", inline=False)
+        return embed
@@ -0,0 +1,30 @@
+"""Odds and payouts shared by the commands and the offline simulator.
+
+Roulette bets live in games/roulette.py (BETS / PAYOUTS) and lottery
+settings in games/lottery.py; everything else is here.
+"""
+
+# Dice: guess one die, a hit returns DICE_PAYOUT times the bet (stake included)
+DICE_SIDES = 6
+DICE_PAYOUT = 5
+
+# Blackjack: the dealer draws below DEALER_STANDS_ON (and stands on soft 17); wins pay even money
+DEALER_STANDS_ON = 17
+BLACKJACK_PAYOUT = 1
+
+# Rob: caught with ROB_CAUGHT_CHANCE and fined a share of the robber's cash + bank,
+# otherwise a uniform ROB_STEAL_MIN-ROB_STEAL_MAX share of the target's cash is taken
+ROB_CAUGHT_CHANCE = 0.2
+ROB_FINE_RATE = 0.3
+ROB_STEAL_MIN = 0.6
+ROB_STEAL_MAX = 1.0
+
+# Crime: succeeds with CRIME_SUCCESS_CHANCE for a uniform reward, otherwise a flat fine
+CRIME_SUCCESS_CHANCE = 0.20
+CRIME_REWARD_MIN = 30000
+CRIME_REWARD_MAX = 50000
+CRIME_FINE = 10000
+
+# Work: uniform pay
+WORK_PAY_MIN = 1000
+WORK_PAY_MAX = 5000
@@ -0,0 +1,85 @@
+from functools import lru_cache
+
+from games.blackjack import CARD_VALUES, RANK_VALUES
+from games.rules import DEALER_STANDS_ON, BLACKJACK_PAYOUT
+
+# Chance of drawing each card value from an infinite shoe
+CARD_ODDS = tuple((value, RANK_VALUES.count(value) / 13) for value in sorted(set(RANK_VALUES)))
+
+def _add(total, soft, value):
+    """Add a card to a (total, soft) state, counting aces as 1 once the hand would bust"""
+    total += value
+    soft += value == 11
+    while total > 21 and soft:
+        total -= 10
+        soft -= 1
+    return total, soft
+
+@lru_cache(maxsize=None)
+def _dealer_outcomes(total, soft):
+    """{final total: probability} for a dealer drawing from this state; 22 means bust"""
+    if total > 21:
+        return {22: 1.0}
+    if total >= DEALER_STANDS_ON:
+        return {total: 1.0}
+    outcomes = {}
+    for value, p in CARD_ODDS:
+        for final, q in _dealer_outcomes(*_add(total, soft, value)).items():
+            outcomes[final] = outcomes.get(final, 0) + p * q
+    return outcomes
+
+def _stand_ev(total, up):
+    ev = 0
+    for final, p in _dealer_outcomes(*_add(0, 0, up)).items():
+        if final > 21 or total > final:
+            ev += p * BLACKJACK_PAYOUT
+        elif total < final:
+            ev -= p
+    return ev
+
+@lru_cache(maxsize=None)
+def _player_ev(total, soft, up):
+    """(expected value of the best play, whether that play is hit) for a player state"""
+    stand = _stand_ev(total, up)
+    hit = 0
+    for value, p in CARD_ODDS:
+        next_total, next_soft = _add(total, soft, value)
+        hit += p * (-1 if next_total > 21 else _player_ev(next_total, next_soft, up)[0])
+    return max(stand, hit), hit > stand
+
+def _build_strategy():
+    strategy = {}
+    for up in range(2, 12):
+        for total in range(4, 22):
+            strategy[(total, False, up)] = _player_ev(total, 0, up)[1]
+        for total in range(12, 22):
+            strategy[(total, True, up)] = _player_ev(total, 1, up)[1]
+    return strategy
+
+# HIT[(player total, soft, dealer upcard value)] is True when hitting beats standing,
+# for the rules BlackjackView plays: hit/stand only, dealer stands on 17, wins pay even money
+HIT = _build_strategy()
+
+def autoplay(game, hands):
+    """Play hands rounds of basic strategy against game's shoe; returns (wins, losses, pushes)"""
+    wins = losses = pushes = 0
+    draw = game.shoe.draw
+    for _ in range(hands):
+        player, dealer = game.deal()
+        up = CARD_VALUES[dealer.cards[0]]
+        while HIT[(player.value, player.soft, up)]:
+            player.add(draw())
+            if player.bust:
+                break
+        if player.bust:
+            losses += 1
+            continue
+        while dealer.value < DEALER_STANDS_ON:
+            dealer.add(draw())
+        if dealer.bust or player.value > dealer.value:
+            wins += 1
+        elif player.value < dealer.value:
+            losses += 1
+        else:
+            pushes += 1
+    return wins, losses, pushes
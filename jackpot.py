@@ -0,0 +1,47 @@
+from periodic import PeriodicTask
+
+# Seconds between folds of pending contributions into the lottery row
+FLUSH_INTERVAL = 5
+# Share of every lost game bet that feeds the progressive jackpot
+GAME_CONTRIBUTION_RATE = 0.01
+
+class JackpotAccumulator:
+    """Jackpot contributions counted per source in memory and added to the lottery row in batches"""
+
+    def __init__(self, db, flush_interval=FLUSH_INTERVAL):
+        self.db = db
+        self.pending = {}
+        self.flusher = PeriodicTask(self.flush, flush_interval, 'flushing jackpot contributions')
+
+    def start(self):
+        """Start the background flush loop"""
+        self.flusher.start()
+
+    async def close(self):
+        """Stop the background loop and write everything still pending"""
+        await self.flusher.stop()
+        await self.flush()
+
+    def add(self, amount, source='lottery'):
+        """Add amount to the jackpot on the next flush"""
+        if amount > 0:
+            self.pending[source] = self.pending.get(source, 0) + amount
+
+    def add_game_bet(self, bet, source):
+        """Contribute the house share of a lost game bet"""
+        self.add(int(bet * GAME_CONTRIBUTION_RATE), source)
+
+    def pending_total(self):
+        return sum(self.pending.values())
+
+    async def flush(self):
+        """Fold all pending contributions into the lottery row"""
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, {}
+        try:
+            await self.db.add_to_jackpot(sum(batch.values()))
+        except BaseException:
+            for source, amount in batch.items():
+                self.add(amount, source)
+            raise
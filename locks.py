@@ -0,0 +1,56 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+# Locks user ids are spread over; two users only wait on each other if they share one
+LOCK_SHARDS = 256
+
+class UserLocks:
+    """Per-user locks for commands that check a balance, await, then change it"""
+
+    def __init__(self, shards=LOCK_SHARDS):
+        self.shards = [asyncio.Lock() for _ in range(shards)]
+        self.metrics = {
+            'acquired': 0,
+            'contended': 0,
+            'wait_total': 0.0,
+            'wait_max': 0.0,
+        }
+
+    def shard(self, user_id):
+        return hash(str(user_id)) % len(self.shards)
+
+    @asynccontextmanager
+    async def hold(self, *user_ids):
+        """Hold the locks of every given user for the duration of the block; not reentrant.
+        Shards are taken in index order, so two-party operations can't deadlock"""
+        locks = [self.shards[index] for index in sorted({self.shard(user_id) for user_id in user_ids})]
+        contended = any(lock.locked() for lock in locks)
+        started = time.perf_counter()
+        acquired = []
+        try:
+            for lock in locks:
+                await lock.acquire()
+                acquired.append(lock)
+            self._record(time.perf_counter() - started, contended)
+            yield
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
+
+    def stats(self):
+        """Acquisition counters plus lock wait times in seconds"""
+        acquired = self.metrics['acquired']
+        return {
+            'acquired': acquired,
+            'contended': self.metrics['contended'],
+            'wait_avg': self.metrics['wait_total'] / acquired if acquired else 0.0,
+            'wait_max': self.metrics['wait_max'],
+            'held': sum(lock.locked() for lock in self.shards),
+        }
+
+    def _record(self, waited, contended):
+        self.metrics['acquired'] += 1
+        self.metrics['contended'] += contended
+        self.metrics['wait_total'] += waited
+        self.metrics['wait_max'] = max(self.metrics['wait_max'], waited)
@@ -0,0 +1,94 @@
+import asyncio
+from collections import OrderedDict
+import time
+
+import discord
+
+# How long a resolved name is trusted before asking Discord again
+NAME_TTL = 3600
+# How long to remember that a user id could not be resolved
+UNKNOWN_TTL = 600
+# Names kept in memory, least recently used dropped first
+MAX_NAMES = 50000
+
+UNKNOWN_USER = "Unknown User"
+
+class NameCache:
+    """Display names by user id, shared by every view that lists players"""
+
+    def __init__(self, bot, ttl=NAME_TTL, unknown_ttl=UNKNOWN_TTL, max_names=MAX_NAMES):
+        self.bot = bot
+        self.ttl = ttl
+        self.unknown_ttl = unknown_ttl
+        self.max_names = max_names
+        self.names = OrderedDict()
+        self.inflight = {}
+
+    def remember(self, user):
+        """Store a user's current name, e.g. from a gateway event"""
+        self._store(str(user.id), user.name, self.ttl)
+
+    def get(self, user_id):
+        """Cached name, UNKNOWN_USER for known-missing ids, or None on a miss"""
+        user_id = str(user_id)
+        entry = self.names.get(user_id)
+        if entry is None:
+            return None
+        name, expires_at = entry
+        if expires_at < time.monotonic():
+            del self.names[user_id]
+            return None
+        self.names.move_to_end(user_id)
+        return name or UNKNOWN_USER
+
+    async def resolve(self, user_ids, guild=None):
+        """Map every user id to a display name with at most one wave of fetches"""
+        result = {}
+        missing = []
+        for user_id in user_ids:
+            user_id = str(user_id)
+            name = self.get(user_id)
+            if name is None:
+                # Members and users the gateway already gave us cost nothing
+                user = guild.get_member(int(user_id)) if guild else None
+                user = user or self.bot.get_user(int(user_id))
+                if user is not None:
+                    self.remember(user)
+                    name = user.name
+            if name is None:
+                missing.append(user_id)
+            else:
+                result[user_id] = name
+
+        if missing:
+            names = await asyncio.gather(*(self._fetch(user_id) for user_id in missing))
+            result.update(zip(missing, names))
+        return result
+
+    async def _fetch(self, user_id):
+        # Share one request between renders asking for the same id at once
+        task = self.inflight.get(user_id)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_user(user_id))
+            self.inflight[user_id] = task
+            task.add_done_callback(lambda _: self.inflight.pop(user_id, None))
+        return await asyncio.shield(task)
+
+    async def _fetch_user(self, user_id):
+        try:
+            user = await self.bot.fetch_user(int(user_id))
+        except discord.NotFound:
+            self._store(user_id, None, self.unknown_ttl)
+            return UNKNOWN_USER
+        except discord.HTTPException as e:
+            # Transient failure: show a placeholder but don't cache it
+            print(f"Error fetching user {user_id}: {e}")
+            return UNKNOWN_USER
+        self.remember(user)
+        return user.name
+
+    def _store(self, user_id, name, ttl):
+        self.names[user_id] = (name, time.monotonic() + ttl)
+        self.names.move_to_end(user_id)
+        while len(self.names) > self.max_names:
+            self.names.popitem(last=False)
@@ -0,0 +1,109 @@
+import asyncio
+from collections import Counter
+from datetime import datetime, timedelta
+import random
+
+import aiohttp
+import discord
+
+# Deliveries in flight at once
+DM_WORKERS = 4
+# Attempts before a message that keeps failing is dropped
+MAX_ATTEMPTS = 6
+# Backoff after a rate limit, server error or connection failure: 2s, 4s, 8s, ... capped
+RETRY_BASE_DELAY = 2
+RETRY_MAX_DELAY = 300
+
+class DMOutbox:
+    """Direct messages queued in the database and delivered by a worker pool"""
+
+    def __init__(self, bot, db, workers=DM_WORKERS):
+        self.bot = bot
+        self.db = db
+        self.workers = workers
+        self.queue = asyncio.Queue()
+        self.tasks = []
+        self.retries = {}
+        self.metrics = Counter()
+
+    async def start(self):
+        """Reload undelivered messages and start the workers"""
+        if self.tasks:
+            return
+        now = datetime.now()
+        for dm_id, user_id, payload, attempts, next_attempt in await self.db.get_pending_dms():
+            delay = (datetime.fromisoformat(next_attempt) - now).total_seconds() if next_attempt else 0
+            self._retry_later((dm_id, user_id, payload, attempts), max(delay, 0))
+        self.tasks = [asyncio.create_task(self.worker()) for _ in range(self.workers)]
+
+    async def close(self):
+        """Stop the workers; undelivered messages stay in the database"""
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        for handle in self.retries.values():
+            handle.cancel()
+        self.retries.clear()
+
+    async def send(self, user_id, content=None, embed=None):
+        """Queue a direct message to one user"""
+        await self.send_many([user_id], content=content, embed=embed)
+
+    async def send_many(self, user_ids, content=None, embed=None):
+        """Queue the same direct message to several users"""
+        user_ids = [str(user_id) for user_id in user_ids]
+        payload = {'content': content, 'embed': embed.to_dict() if embed else None}
+        dm_ids = await self.db.enqueue_dms([(user_id, payload) for user_id in user_ids])
+        for dm_id, user_id in zip(dm_ids, user_ids):
+            self.queue.put_nowait((dm_id, user_id, payload, 0))
+        self.metrics['queued'] += len(dm_ids)
+
+    def stats(self):
+        """Delivery counters plus how many messages are still waiting"""
+        return {
+            'queued': self.metrics['queued'],
+            'sent': self.metrics['sent'],
+            'retried': self.metrics['retried'],
+            'failed': self.metrics['failed'],
+            'pending': self.queue.qsize() + len(self.retries),
+        }
+
+    async def worker(self):
+        while True:
+            dm = await self.queue.get()
+            try:
+                await self.deliver(*dm)
+            except Exception as e:
+                print(f"Error delivering DM {dm[0]}: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def deliver(self, dm_id, user_id, payload, attempts):
+        try:
+            user = self.bot.get_user(int(user_id)) or await self.bot.fetch_user(int(user_id))
+            embed = discord.Embed.from_dict(payload['embed']) if payload.get('embed') else None
+            await user.send(content=payload.get('content'), embed=embed)
+        except (discord.HTTPException, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            attempts += 1
+            # Connection resets and timeouts are as transient as 5xx responses
+            transient = not isinstance(e, discord.HTTPException) or e.status == 429 or e.status >= 500
+            if transient and attempts < MAX_ATTEMPTS:
+                delay = min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY)
+                delay *= random.uniform(0.5, 1)
+                await self.db.reschedule_dm(dm_id, attempts, datetime.now() + timedelta(seconds=delay))
+                self._retry_later((dm_id, user_id, payload, attempts), delay)
+                self.metrics['retried'] += 1
+                return
+            # Closed DMs, unknown users and exhausted retries won't get better
+            print(f"Dropping DM to user {user_id} after {attempts} attempt(s): {e}")
+            self.metrics['failed'] += 1
+        else:
+            self.metrics['sent'] += 1
+        await self.db.delete_dm(dm_id)
+
+    def _retry_later(self, dm, delay):
+        def requeue():
+            del self.retries[dm[0]]
+            self.queue.put_nowait(dm)
+        self.retries[dm[0]] = asyncio.get_running_loop().call_later(delay, requeue)
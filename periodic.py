@@ -0,0 +1,60 @@
+import asyncio
+
+async def cancel(task):
+    """Cancel a background task and wait until it has stopped"""
+    if task is None:
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+class PeriodicTask:
+    """Awaits func every interval seconds in the background, or as soon as wake is set"""
+
+    def __init__(self, func, interval, name, wake=None):
+        self.func = func
+        self.interval = interval
+        self.name = name
+        self.wake = wake
+        self.task = None
+        self.stopping = False
+        # True while func() is running; stop() lets that call finish instead of cancelling it
+        self.busy = False
+
+    def start(self):
+        if self.task is None:
+            self.stopping = False
+            self.task = asyncio.create_task(self.loop())
+
+    async def stop(self):
+        """Stop the loop; a func() call already in flight runs to completion first"""
+        if self.task is None:
+            return
+        self.stopping = True
+        if not self.busy:
+            self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+
+    async def loop(self):
+        while not self.stopping:
+            if self.wake is None:
+                await asyncio.sleep(self.interval)
+            else:
+                try:
+                    await asyncio.wait_for(self.wake.wait(), timeout=self.interval)
+                except asyncio.TimeoutError:
+                    pass
+                self.wake.clear()
+            self.busy = True
+            try:
+                await self.func()
+            except Exception as e:
+                print(f"Error {self.name}: {e}")
+            finally:
+                self.busy = False
@@ -0,0 +1,121 @@
+from bisect import bisect_left, insort
+
+# Target number of users per bucket; buckets split at twice this size
+BUCKET_SIZE = 512
+
+class _Fenwick:
+    """Prefix sums over bucket sizes, so a bucket's starting rank is O(log n)"""
+
+    def __init__(self, sizes):
+        self.tree = [0] * (len(sizes) + 1)
+        for i, size in enumerate(sizes):
+            self.add(i, size)
+
+    def add(self, i, delta):
+        i += 1
+        while i < len(self.tree):
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix(self, i):
+        """Sum of the sizes of buckets [0, i)"""
+        total = 0
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def find(self, offset):
+        """Index of the bucket holding position offset and the position inside it"""
+        i = 0
+        step = 1 << (len(self.tree).bit_length() - 1)
+        while step:
+            nxt = i + step
+            if nxt < len(self.tree) and self.tree[nxt] <= offset:
+                i = nxt
+                offset -= self.tree[nxt]
+            step >>= 1
+        return i, offset
+
+class RankIndex:
+    """Users ordered by total wealth, richest first"""
+
+    def __init__(self):
+        self.wealth = {}
+        self.buckets = []
+        self.maxes = []
+        self.sizes = _Fenwick([])
+
+    def __len__(self):
+        return len(self.wealth)
+
+    def load(self, rows):
+        """Rebuild from (user_id, total_wealth) rows"""
+        self.wealth = {str(user_id): wealth for user_id, wealth in rows}
+        keys = sorted((-wealth, user_id) for user_id, wealth in self.wealth.items())
+        self.buckets = [keys[i:i + BUCKET_SIZE] for i in range(0, len(keys), BUCKET_SIZE)]
+        self._reindex()
+
+    def update(self, user_id, wealth):
+        """Record a user's new total wealth"""
+        user_id = str(user_id)
+        old = self.wealth.get(user_id)
+        if old == wealth:
+            return
+        if old is not None:
+            self._remove((-old, user_id))
+        self.wealth[user_id] = wealth
+        self._insert((-wealth, user_id))
+
+    def get_rank(self, user_id):
+        """1-based leaderboard position, or None for unknown users"""
+        user_id = str(user_id)
+        wealth = self.wealth.get(user_id)
+        if wealth is None:
+            return None
+        key = (-wealth, user_id)
+        i = bisect_left(self.maxes, key)
+        return self.sizes.prefix(i) + bisect_left(self.buckets[i], key) + 1
+
+    def get_page(self, offset, limit):
+        """(user_id, total_wealth) rows for positions [offset, offset + limit)"""
+        if offset >= len(self.wealth) or limit <= 0:
+            return []
+        i, pos = self.sizes.find(offset)
+        page = []
+        while i < len(self.buckets) and len(page) < limit:
+            for neg_wealth, user_id in self.buckets[i][pos:pos + limit - len(page)]:
+                page.append((user_id, -neg_wealth))
+            i += 1
+            pos = 0
+        return page
+
+    def _insert(self, key):
+        if not self.buckets:
+            self.buckets.append([key])
+            self._reindex()
+            return
+        i = min(bisect_left(self.maxes, key), len(self.buckets) - 1)
+        bucket = self.buckets[i]
+        insort(bucket, key)
+        self.maxes[i] = bucket[-1]
+        if len(bucket) > 2 * BUCKET_SIZE:
+            self.buckets[i:i + 1] = [bucket[:BUCKET_SIZE], bucket[BUCKET_SIZE:]]
+            self._reindex()
+        else:
+            self.sizes.add(i, 1)
+
+    def _remove(self, key):
+        i = bisect_left(self.maxes, key)
+        bucket = self.buckets[i]
+        del bucket[bisect_left(bucket, key)]
+        if not bucket:
+            del self.buckets[i]
+            self._reindex()
+            return
+        self.maxes[i] = bucket[-1]
+        self.sizes.add(i, -1)
+
+    def _reindex(self):
+        self.maxes = [bucket[-1] for bucket in self.buckets]
+        self.sizes = _Fenwick([len(bucket) for bucket in self.buckets])
@@ -0,0 +1,35 @@
+import time
+
+# Clicks a user can make in a burst on one message, and how fast they come back
+CLICK_BURST = 4
+CLICK_RATE = 2
+# Buckets kept before idle (full) ones are dropped
+MAX_BUCKETS = 10000
+
+class RateLimiter:
+    """Token buckets by key, e.g. (user id, message id) for paginator clicks"""
+
+    def __init__(self, rate=CLICK_RATE, burst=CLICK_BURST, max_buckets=MAX_BUCKETS):
+        self.rate = rate
+        self.burst = burst
+        self.max_buckets = max_buckets
+        self.buckets = {}
+
+    def allow(self, key):
+        now = time.monotonic()
+        tokens, updated = self.buckets.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens < 1:
+            self.buckets[key] = (tokens, now)
+            return False
+        self.buckets[key] = (tokens - 1, now)
+        if len(self.buckets) > self.max_buckets:
+            self._prune(now)
+        return True
+
+    def _prune(self, now):
+        # A bucket that has refilled is the same as no bucket
+        self.buckets = {
+            key: (tokens, updated) for key, (tokens, updated) in self.buckets.items()
+            if tokens + (now - updated) * self.rate < self.burst
+        }
@@ -0,0 +1,39 @@
+import asyncio
+from datetime import datetime
+
+from periodic import cancel
+
+# Wait before retrying a job that raised
+RETRY_DELAY = 60
+
+class DeadlineScheduler:
+    """Runs run(deadline) once load_deadline() has passed; run must persist the next deadline"""
+
+    def __init__(self, load_deadline, run, name='job'):
+        self.load_deadline = load_deadline
+        self.run = run
+        self.name = name
+        self.task = None
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self.loop())
+
+    async def stop(self):
+        await cancel(self.task)
+        self.task = None
+
+    async def loop(self):
+        while True:
+            try:
+                deadline = await self.load_deadline()
+                delay = (deadline - datetime.now()).total_seconds()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    continue
+                await self.run(deadline)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error running scheduled {self.name}: {e}")
+                await asyncio.sleep(RETRY_DELAY)
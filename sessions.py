@@ -0,0 +1,88 @@
+import time
+
+from periodic import PeriodicTask
+
+# Seconds between checks for games nobody touched before their timeout
+SWEEP_INTERVAL = 5
+
+class SessionStore:
+    """In-flight button games keyed by message id, kept in memory and written through to the database"""
+
+    def __init__(self, db, sweep_interval=SWEEP_INTERVAL):
+        self.db = db
+        self.sessions = {}
+        self.handlers = {}
+        self.sweeper = PeriodicTask(self.sweep, sweep_interval, 'sweeping game sessions')
+
+    def on_expire(self, game, handler):
+        """Call handler(message_id, session) when a session of this game times out"""
+        self.handlers[game] = handler
+
+    async def start(self):
+        """Load sessions left by the last run and start the sweep loop"""
+        if self.sweeper.task is not None:
+            return
+        for message_id, channel_id, game, state, expires_at in await self.db.get_game_sessions():
+            self.sessions[message_id] = {
+                'game': game,
+                'channel_id': channel_id,
+                'state': state,
+                'expires_at': expires_at,
+            }
+        self.sweeper.start()
+
+    async def close(self):
+        await self.sweeper.stop()
+
+    def get(self, message_id, game):
+        """The session for a message, or None if it ended or belongs to another game"""
+        session = self.sessions.get(message_id)
+        if session is None or session['game'] != game:
+            return None
+        return session
+
+    async def create(self, message_id, channel_id, game, state, timeout):
+        """Start tracking a game whose buttons live on message_id"""
+        self.sessions[message_id] = {
+            'game': game,
+            'channel_id': channel_id,
+            'state': state,
+            'expires_at': time.time() + timeout,
+        }
+        await self._write(message_id)
+
+    async def update(self, message_id, timeout):
+        """Persist a session's mutated state and push its timeout back"""
+        session = self.sessions.get(message_id)
+        if session is None:
+            return
+        session['expires_at'] = time.time() + timeout
+        await self._write(message_id)
+
+    async def delete(self, message_id):
+        """End a session. It leaves memory before the first await, so a
+        concurrent click on the same message already sees it as ended."""
+        if self.sessions.pop(message_id, None) is not None:
+            await self.db.delete_game_session(message_id)
+
+    async def sweep(self):
+        now = time.time()
+        expired = [message_id for message_id, session in self.sessions.items() if session['expires_at'] <= now]
+        for message_id in expired:
+            # Earlier handlers awaited; the game may have ended or been played since
+            session = self.sessions.get(message_id)
+            if session is None or session['expires_at'] > time.time():
+                continue
+            await self.delete(message_id)
+            handler = self.handlers.get(session['game'])
+            if handler is not None:
+                try:
+                    await handler(message_id, session)
+                except Exception as e:
+                    print(f"Error expiring {session['game']} session {message_id}: {e}")
+
+    async def _write(self, message_id):
+        session = self.sessions[message_id]
+        await self.db.save_game_session(
+            message_id, session['channel_id'], session['game'], session['state'], session['expires_at']
+        )
@@ -0,0 +1,169 @@
+"""Monte Carlo check of every game's odds, driven by the same rule constants the commands use.
+
+Needs numpy, which the bot itself does not. Run from the repository root:
+    python simulate.py [--rounds N] [--seed S]
+"""
+import argparse
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    sys.exit("simulate.py needs numpy: pip install numpy")
+
+from games import rules
+from games.blackjack import RANK_VALUES
+from games.roulette import BET_INDEX, PAYOUTS
+from games.strategy import HIT
+
+# Rounds simulated per batch, to keep memory flat for large --rounds
+BATCH = 1_000_000
+# Bankroll drift: players starting with the default balance, betting a fixed amount each round
+STARTING_BALANCE = 10000
+DRIFT_PLAYERS = 1000
+DRIFT_ROUNDS = 1000
+DRIFT_BET = 100
+
+def roulette_bet(name):
+    """Net result per $1 on one roulette bet"""
+    column = np.asarray(PAYOUTS, dtype=np.int64)[:, BET_INDEX[name]]
+    return lambda rng, n: column[rng.integers(0, 37, n)]
+
+def dice(rng, n):
+    """Net result per $1 guessing one face"""
+    hit = rng.integers(1, rules.DICE_SIDES + 1, n) == 1
+    return np.where(hit, rules.DICE_PAYOUT - 1, -1)
+
+def _draw(rng, total, soft, hit):
+    """Hit every hand while hit(total, soft) holds, tracking aces counted as 11 like Hand does"""
+    values = np.asarray(RANK_VALUES)
+    active = hit(total, soft) & (total <= 21)
+    while active.any():
+        card = values[rng.integers(0, 13, active.sum())]
+        total[active] += card
+        soft[active] += card == 11
+        # Demote aces while a hand is over 21
+        while True:
+            fix = (total > 21) & (soft > 0)
+            if not fix.any():
+                break
+            total[fix] -= 10
+            soft[fix] -= 1
+        active = active & hit(total, soft) & (total <= 21)
+    return total
+
+def _draw_to(rng, total, soft, target):
+    """Hit every hand below target"""
+    return _draw(rng, total, soft, lambda total, soft: total < target)
+
+def _deal(rng, n):
+    return _hand(np.asarray(RANK_VALUES)[rng.integers(0, 13, (n, 2))])
+
+def _hand(cards):
+    """(total, soft aces) of two-card hands given as an (n, 2) array of card values"""
+    total = cards.sum(axis=1)
+    soft = (cards == 11).sum(axis=1)
+    # A pair of aces is 12 with one soft ace
+    total[total == 22] = 12
+    soft[soft == 2] = 1
+    return total, soft
+
+def blackjack(stand_on):
+    """Net result per $1 for a player hitting below stand_on (infinite shoe)"""
+    def play(rng, n):
+        player = _draw_to(rng, *_deal(rng, n), stand_on)
+        dealer = _draw_to(rng, *_deal(rng, n), rules.DEALER_STANDS_ON)
+        # The player busts first and loses even if the dealer would bust too
+        win = (player <= 21) & ((dealer > 21) | (player > dealer))
+        lose = (player > 21) | ((dealer <= 21) & (player < dealer))
+        return np.where(win, rules.BLACKJACK_PAYOUT, np.where(lose, -1, 0))
+    return play
+
+def blackjack_strategy(rng, n):
+    """Net result per $1 playing games.strategy.HIT against the dealer's upcard (infinite shoe)"""
+    # HIT as an array indexed [total, soft, upcard value]
+    table = np.zeros((22, 2, 12), dtype=bool)
+    for (total, soft, up), hit in HIT.items():
+        table[total, int(soft), up] = hit
+    dealer_cards = np.asarray(RANK_VALUES)[rng.integers(0, 13, (n, 2))]
+    up = dealer_cards[:, 0]
+    player = _draw(rng, *_deal(rng, n), lambda total, soft: table[np.minimum(total, 21), (soft > 0).astype(int), up])
+    dealer = _draw_to(rng, *_hand(dealer_cards), rules.DEALER_STANDS_ON)
+    win = (player <= 21) & ((dealer > 21) | (player > dealer))
+    lose = (player > 21) | ((dealer <= 21) & (player < dealer))
+    return np.where(win, rules.BLACKJACK_PAYOUT, np.where(lose, -1, 0))
+
+def rob(target_cash, robber_balance):
+    """Robber's net dollars per attempt"""
+    def play(rng, n):
+        caught = rng.random(n) < rules.ROB_CAUGHT_CHANCE
+        stolen = (target_cash * rng.uniform(rules.ROB_STEAL_MIN, rules.ROB_STEAL_MAX, n)).astype(np.int64)
+        return np.where(caught, -int(robber_balance * rules.ROB_FINE_RATE), stolen)
+    return play
+
+def crime(rng, n):
+    """Net dollars per attempt"""
+    success = rng.random(n) < rules.CRIME_SUCCESS_CHANCE
+    reward = rng.integers(rules.CRIME_REWARD_MIN, rules.CRIME_REWARD_MAX + 1, n)
+    return np.where(success, reward, -rules.CRIME_FINE)
+
+def work(rng, n):
+    """Net dollars per shift"""
+    return rng.integers(rules.WORK_PAY_MIN, rules.WORK_PAY_MAX + 1, n)
+
+def games():
+    """(name, unit, simulate(rng, n), stake per round for the bankroll drift)"""
+    table = [
+        (f"roulette {name}", "per $1", roulette_bet(name), DRIFT_BET)
+        for name in ('7', '8/11', '1-12', 'col1', 'red', 'even', '1-18')
+    ]
+    table += [
+        ("dice", "per $1", dice, DRIFT_BET),
+        ("blackjack (mimic dealer)", "per $1", blackjack(rules.DEALER_STANDS_ON), DRIFT_BET),
+        ("blackjack (stand on 12)", "per $1", blackjack(12), DRIFT_BET),
+        ("blackjack (basic strategy)", "per $1", blackjack_strategy, DRIFT_BET),
+        ("rob ($10k target)", "$", rob(STARTING_BALANCE, STARTING_BALANCE), 1),
+        ("crime", "$", crime, 1),
+        ("work", "$", work, 1),
+    ]
+    return table
+
+def summarize(simulate, rng, rounds):
+    """Mean and standard deviation of simulate over rounds, plus rounds per second"""
+    total = 0.0
+    total_sq = 0.0
+    done = 0
+    start = time.perf_counter()
+    while done < rounds:
+        n = min(BATCH, rounds - done)
+        result = simulate(rng, n).astype(np.float64)
+        total += result.sum()
+        total_sq += (result * result).sum()
+        done += n
+    elapsed = time.perf_counter() - start
+    mean = total / rounds
+    return mean, (total_sq / rounds - mean * mean) ** 0.5, rounds / elapsed
+
+def bankroll_drift(simulate, rng, stake):
+    """Mean balance after DRIFT_ROUNDS rounds and the share of players who went broke"""
+    results = simulate(rng, DRIFT_PLAYERS * DRIFT_ROUNDS).reshape(DRIFT_PLAYERS, DRIFT_ROUNDS) * stake
+    balances = STARTING_BALANCE + np.cumsum(results, axis=1)
+    return balances[:, -1].mean(), (balances.min(axis=1) <= 0).mean()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=10_000_000, help="rounds per game")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    print(f"{'game':<28}{'unit':>7}{'EV':>12}{'std dev':>12}{'rounds/s':>12}"
+          f"{'balance after ' + str(DRIFT_ROUNDS):>22}{'broke':>8}")
+    for name, unit, simulate, stake in games():
+        mean, std, rate = summarize(simulate, rng, args.rounds)
+        balance, broke = bankroll_drift(simulate, rng, stake)
+        print(f"{name:<28}{unit:>7}{mean:>12.4f}{std:>12.2f}{rate:>12.3g}{balance:>22,.0f}{broke:>8.1%}")
+
+if __name__ == '__main__':
+    main()